@@ -1,23 +1,35 @@
-import io
+import os
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import pyarrow as pa
-from utils.column_detection import detect_column_types
-from utils.data_cleaning import clean_data
-from utils.charts import generate_overview_charts
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.column_detection import COLUMN_KINDS, detect_column_types
+from utils.data_cleaning import clean_data, sanitize_df_for_streamlit, to_arrow_table
+from utils.csv_ingest import STREAMING_THRESHOLD_MB, read_csv_streaming
+from utils.aggregation import GroupedSums
+from utils.charts import (
+    add_linear_trend, add_trend_trace, density_figure, generate_overview_charts,
+    histogram_figure, linear_trend, show_reduction
+)
+from utils.downsampling import Reduction, reduce_lines, reduce_scatter, stratified_sample
 from utils.chart_suggester import suggest_chart_type
+from utils.compute import OUT_OF_CORE_SAMPLE_ROWS, PandasBackend, available_backends, list_data_files, open_out_of_core
+from utils.dataset_store import DatasetStore, default_store_dir, describe_options
+from utils.excel_ingest import WorkbookIngest, create_sheet_pool
+from utils.export import (
+    EXCEL_MAX_ROWS, EXPORT_CHUNK_ROWS, EXPORT_FORMATS, EXPORT_WORKERS, ExportStore, available_formats,
+    default_export_dir, static_url_prefix
+)
+from utils.ingest_cache import IngestCache, content_hash, enable_copy_on_write, make_cache_key
+from utils.instrumentation import make_perf_history, plotly_chart, render_performance_panel, stage, start_rerun
+from utils.pipeline import LazyDataset, Page, make_debug_log
+from utils.timeseries import GRANULARITY_OPTIONS, get_rollups, granularity_label
+from utils.workers import create_worker_pool, fill_as_completed, placeholder, start_job_batch
 from pandas.api.types import (
     is_datetime64_any_dtype as is_datetime,
-    is_numeric_dtype,
-    is_integer_dtype,
-    is_float_dtype,
-    is_bool_dtype,
-    is_datetime64_any_dtype,
-    is_string_dtype,
-    is_object_dtype
+    is_numeric_dtype
 )
 
 st.set_page_config(page_title="HR Data Insights", layout="wide")
@@ -53,336 +65,669 @@ page = st.session_state.current_page
 st.sidebar.markdown("---")
 
 uploaded_file = st.sidebar.file_uploader("\U0001F4C4 Upload Excel or CSV File", type=["xlsx", "csv"])
-if uploaded_file is None and page != "About":
-    st.warning("⚠️ Please upload a file to begin.")
-    st.stop()
 
 if "debug_logs" not in st.session_state:
-    st.session_state.debug_logs = []
+    st.session_state.debug_logs = make_debug_log()
 
 debug_logs = st.session_state.debug_logs
 
-def sanitize_df_for_streamlit(df: pd.DataFrame) -> pd.DataFrame:
-    import pyarrow as pa
-    import numpy as np
-    from pandas.api.types import (
-        is_float_dtype, is_bool_dtype,
-        is_datetime64_any_dtype, is_string_dtype,
-        is_object_dtype
-    )
-
-    df = df.copy()
-    df.columns = [str(col).strip() for col in df.columns]
-
-    if "Type" in df.columns:
-        df.drop(columns=["Type"], inplace=True)
-
-    to_drop = []
-    for col in df.columns:
-        col_data = df[col]
-        try:
-            if pd.api.types.is_integer_dtype(col_data) or isinstance(col_data.dtype, pd.Int64Dtype):
-                df[col] = pd.to_numeric(col_data, errors='coerce').fillna(0).astype(np.int64)
-            elif is_float_dtype(col_data):
-                df[col] = pd.to_numeric(col_data, errors='coerce').fillna(0.0).astype(np.float64)
-            elif is_bool_dtype(col_data):
-                df[col] = col_data.fillna(False).astype(bool)
-            elif is_datetime64_any_dtype(col_data):
-                df[col] = pd.to_datetime(col_data, errors='coerce')
-            elif is_string_dtype(col_data) or is_object_dtype(col_data):
-                df[col] = col_data.astype(str).fillna("")
-
-            _ = pa.array(df[col])
-
-        except Exception:
-            to_drop.append(col)
-
-    if to_drop:
-        debug_logs.append(f"⚠️ Dropping problematic columns: {to_drop}")
-        df.drop(columns=to_drop, inplace=True)
-
-    return df
-
-if uploaded_file is not None:
+if "perf_history" not in st.session_state:
+    st.session_state.perf_history = make_perf_history()
+
+perf_history = st.session_state.perf_history
+
+@st.cache_resource
+def get_ingest_cache() -> IngestCache:
+    # One cache per server process: every session reads the same cleaned frames
+    enable_copy_on_write()
+    budget_mb = int(os.environ.get("DATA_INSIGHTS_CACHE_MB", "2048"))
+    spill_dir = os.environ.get("DATA_INSIGHTS_SPILL_DIR") or None
+    idle_minutes = float(os.environ.get("DATA_INSIGHTS_IDLE_MINUTES", "30"))
+    return IngestCache(max_bytes=budget_mb * 1024 ** 2, spill_dir=spill_dir,
+                       idle_seconds=idle_minutes * 60 if idle_minutes > 0 else None)
+
+ingest_cache = get_ingest_cache()
+
+def get_session_id() -> str:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+session_id = get_session_id()
+ingest_cache.touch(session_id)
+
+@st.cache_resource
+def get_dataset_store() -> DatasetStore | None:
+    # Uploads stay in memory unless DATA_INSIGHTS_STORE_DIR opts in to keeping them on disk
+    root = default_store_dir()
+    if root is None:
+        return None
+    max_mb = int(os.environ.get("DATA_INSIGHTS_STORE_MB", "4096"))
+    max_days = float(os.environ.get("DATA_INSIGHTS_STORE_DAYS", "30"))
+    return DatasetStore(root, max_bytes=max_mb * 1024 ** 2,
+                        max_age_seconds=max_days * 86400 if max_days > 0 else None)
+
+dataset_store = get_dataset_store()
+
+@st.cache_resource(max_entries=16)
+def get_profile(dataset_key, _backend, _column_types):
+    # IDs and free text still get counts and distinct estimates, just no top-k
+    skip_top = _column_types.get("identifier", []) + _column_types.get("text", [])
+    return _backend.profile(skip_top=skip_top)
+
+@st.cache_resource(max_entries=64)
+def get_grouped_sums(dataset_key, group_cols, value_cols, _backend) -> GroupedSums:
+    # One partial-sum table per (grouping, numeric column set), shared by all pages
+    with stage("GroupedSums", rows_in=_backend.rows):
+        return _backend.grouped_sums(group_cols, value_cols)
+
+@st.cache_resource(max_entries=4)
+def get_out_of_core_backend(path, mtime_ns, size):
+    # One DuckDB connection per file version; a rewritten file gets a fresh one
+    return open_out_of_core(path)
+
+@st.cache_resource
+def get_worker_pool():
+    return create_worker_pool()
+
+# Jobs from this session's previous (superseded) rerun are cancelled here
+jobs = start_job_batch(get_worker_pool(), st.session_state)
+
+@st.cache_resource
+def get_sheet_pool():
+    return create_sheet_pool()
+
+@st.cache_resource(max_entries=8, on_release=WorkbookIngest.close)
+def get_workbook(file_hash, _uploaded_file) -> WorkbookIngest:
+    # Opened once per distinct workbook; all sheets start parsing in the background.
+    # An evicted workbook cancels its pending sheets and deletes its temp file
+    return WorkbookIngest(_uploaded_file.getvalue(), file_hash, pool=get_sheet_pool())
+
+if "file_hashes" not in st.session_state:
+    st.session_state.file_hashes = {}
+
+def get_file_hash(uploaded_file) -> str:
+    # Hash each upload once per session instead of on every rerun
+    file_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    if file_id not in st.session_state.file_hashes:
+        st.session_state.file_hashes[file_id] = content_hash(uploaded_file.getbuffer())
+    return st.session_state.file_hashes[file_id]
+
+def artifact_backend(dataset):
+    return PandasBackend(dataset.df)
+
+def artifact_profile(dataset):
+    return get_profile(dataset.key, dataset.get("backend"), dataset.column_types)
+
+# Aggregations go through the dataset's compute backend: pandas over the cached frame
+# by default, DuckDB over the file itself for datasets opened out-of-core
+DATASET_ARTIFACTS = {
+    "backend": artifact_backend,
+    "profile": artifact_profile,
+}
+
+def log_loaded_frame(name, df):
+    # Built once per ingest, not on every rerun
+    debug_logs.append(f"✅ Loaded {name}: {df.shape[0]} rows × {df.shape[1]} columns")
+    debug_logs.append("📐 Data types: " + str(df.dtypes.astype(str).to_dict()))
+
+def prepare_uploaded_file(uploaded_file) -> LazyDataset:
     st.sidebar.info(f"📄 **Uploaded:** `{uploaded_file.name}`\n\n📦 **Size:** {uploaded_file.size / 1024:.2f} KB")
     file_type = uploaded_file.name.split(".")[-1]
 
+    file_hash = get_file_hash(uploaded_file)
+
+    with st.sidebar.expander("🧹 Cleaning Options"):
+        cleaning_options = {
+            "strip_whitespace": st.checkbox("Trim whitespace in text", value=True),
+            "parse_dates": st.checkbox("Parse date-like columns", value=True),
+            "drop_duplicates": st.checkbox("Drop duplicate rows", value=True),
+        }
+
     if file_type == "csv":
-        df = pd.read_csv(uploaded_file)
+        selected_sheet = None
     elif file_type == "xlsx":
-        sheet_names = pd.ExcelFile(uploaded_file).sheet_names
-        selected_sheet = st.sidebar.selectbox("📚 Select a Sheet", sheet_names)
-        df = pd.read_excel(uploaded_file, sheet_name=selected_sheet)
+        workbook = get_workbook(file_hash, uploaded_file)
+        selected_sheet = st.sidebar.selectbox("📚 Select a Sheet", workbook.sheet_names)
     else:
         st.error("Unsupported file format.")
-        st.stop()
-
-    df_clean = clean_data(df)
-    df_clean = sanitize_df_for_streamlit(df_clean)
-    df = df_clean.copy()
-
-    if "Type" in df_clean.columns:
-        print("⚠️ 'Type' column still exists after sanitization!")
-
-    if "Type" in df_clean.columns:
-        print(df_clean["Type"].head())
-        print("dtype:", df_clean["Type"].dtype)
-
-    print(df_clean.dtypes)
-    print("Columns:", df_clean.columns.tolist())
-
-    #df_clean.columns = [str(c) for c in df_clean.columns]
-    column_types = detect_column_types(df_clean)
-
-    debug_logs.append("✅ After sanitization: " + str(df_clean.columns.tolist()))
-    debug_logs.append("📦 Columns before Arrow serialization: " + str(df.columns.tolist()))
-    debug_logs.append("📐 Data types: " + str(df.dtypes.to_dict()))
-    debug_logs.append("📤 Final df columns: " + str(df.columns.tolist()))
-    debug_logs.append("📤 Final df dtypes: " + str(df.dtypes.to_dict()))
-
-    if page == "Main Dashboard":
-        st.success(f"✅ File loaded successfully! ({df_clean.shape[0]} rows × {df_clean.shape[1]} columns)")
-        
-
-        #if "Type" in df.columns:
-            #st.error("❌ 'Type' column STILL exists! You’re using the wrong df!")
-            #st.stop()
-
-
-        st.subheader("\U0001F50D Data Preview")
-        st.dataframe(df_clean.head(10), use_container_width=True)
-        #st.write("Debug columns:", df_clean.columns.tolist())
-
-        st.subheader("\U0001F4CC Dataset Summary")
-        st.markdown(f"- **Rows:** {df_clean.shape[0]}")
-        st.markdown(f"- **Columns:** {df_clean.shape[1]}")
-        summary = pd.DataFrame({
-            "Column": df_clean.columns,
-            "Type": [df_clean[col].dtype for col in df_clean.columns],
-            "Missing (%)": [round(df_clean[col].isna().mean() * 100, 2) for col in df_clean.columns]
-        })
-        st.dataframe(summary, use_container_width=True)
-
-
-        st.subheader("\U0001F4C2 Column Type Summary")
-        for dtype, cols in column_types.items():
-            st.markdown(f"**{dtype.title()} Columns:** {', '.join(cols) if cols else '❌ None detected'}")
-
-        st.subheader("\U0001F4C8 Initial Visual Insights")
-        #st.write("Detected column types:", column_types)
-
-        generate_overview_charts(df_clean, column_types)
-
-    elif page == "Customize Your Chart":
-        st.subheader("⚙️ Customize Your Charts")
-
-        if column_types["categorical"]:
-            selected_cat = st.multiselect("\U0001F4CA Categorical Columns to Visualize", column_types["categorical"])
-            for col in selected_cat:
-                st.markdown(f"#### `{col}` Value Counts")
-                top_values = df_clean[col].value_counts().head(10).reset_index()
-                top_values.columns = [col, "Count"]
-                fig = px.bar(top_values, x=col, y="Count", color=col,
-                             color_discrete_sequence=px.colors.qualitative.Pastel,
-                             labels={col: col, "Count": "Frequency"},
-                             title=f"Top 10 Values in {col}")
-                fig.update_layout(margin=dict(t=50, b=40), height=400)
-                st.plotly_chart(fig, use_container_width=True, key=f"cat_{col}")
-
-        if column_types["numerical"]:
-            selected_num = st.multiselect("\U0001F4C9 Numerical Columns to Visualize", column_types["numerical"])
-            for col in selected_num:
-                st.markdown(f"#### `{col}` Histogram")
-                fig = px.histogram(df_clean, x=col, nbins=20,
-                                   color_discrete_sequence=['#4F81BD'],
-                                   labels={col: col},
-                                   title=f"Distribution of {col}")
-                fig.update_layout(margin=dict(t=50, b=40), height=400)
-                st.plotly_chart(fig, use_container_width=True, key=f"num_{col}")
-
-        if column_types["datetime"] and column_types["numerical"]:
-            date_col = st.selectbox("\U0001F4C5 Choose Date Column", column_types["datetime"])
-            value_col = st.selectbox("\U0001F4B0 Choose Numeric Column to Plot", column_types["numerical"])
-            ts = df_clean[[date_col, value_col]].dropna()
-            ts[date_col] = pd.to_datetime(ts[date_col])
-            agg = ts.groupby(date_col)[value_col].sum().reset_index()
-            fig = px.line(agg, x=date_col, y=value_col,
-                          title=f"{value_col} Over Time ({date_col})",
-                          markers=True)
-            fig.update_traces(line=dict(color="#E26A6A", width=2))
-            fig.update_layout(margin=dict(t=50, b=40), height=400)
-            st.plotly_chart(fig, use_container_width=True)
-
-    elif page == "Build Your Own Chart":
-        st.subheader("🛠️ Build Your Own Chart")
-
-        col1, col2, col3, col4 = st.columns(4)
-        x_axis = col1.selectbox("X-Axis", df_clean.columns)
-        y_axis = col2.multiselect("Y-Axis", ["None"] + list(df_clean.columns))
-        color_by = col3.selectbox("Color By", ["None"] + column_types["categorical"])
-
-        # Suggest
-        chart_type_suggestion = suggest_chart_type(df_clean, x_axis, y_axis if y_axis else None)
-        st.markdown(f"\U0001F4A1 **Suggested Chart:** `{chart_type_suggestion}`")
-
-        chart_options = ["Bar", "Histogram", "Scatter", "Line", "Pie", "Area", "Bubble", "Waterfall"]
-        chart_type = col4.selectbox("Chart Type", chart_options, index=chart_options.index(chart_type_suggestion))
-
-        fig = None
-        if chart_type == "Bar":
-            if y_axis != "None":
-                data = df_clean.groupby(x_axis)[y_axis].sum().reset_index()
-                fig = px.bar(data, x=x_axis, y=y_axis,
-                             color=color_by if color_by != "None" else None,
-                             title=f"Bar Chart: {y_axis} by {x_axis}")
-            else:
-                data = df_clean[x_axis].value_counts().reset_index()
-                data.columns = [x_axis, "Count"]
-                fig = px.bar(data, x=x_axis, y="Count",
+        return None
+
+    # Large CSVs are parsed, cleaned and sanitized chunk by chunk
+    use_streaming = file_type == "csv" and uploaded_file.size > STREAMING_THRESHOLD_MB * 1024 ** 2
+    cache_key = make_cache_key(file_hash, selected_sheet, {**cleaning_options, "streaming": use_streaming})
+
+    def ingest_upload():
+        # A dataset cleaned in an earlier session is memory-mapped instead of re-parsed
+        if dataset_store is not None and dataset_store.has(cache_key):
+            with stage("dataset_store.open"):
+                return dataset_store.open(cache_key)
+
+        uploaded_file.seek(0)
+        if use_streaming:
+            cleaned = read_csv_streaming(uploaded_file, logs=debug_logs, **cleaning_options)
+        else:
+            with stage(f"read {file_type}") as record:
+                if file_type == "csv":
+                    raw_df = pd.read_csv(uploaded_file)
+                else:
+                    raw_df = workbook.read(selected_sheet)
+                record.output(raw_df)
+            cleaning_timings = {}
+            cleaned = clean_data(raw_df, copy=False, timings=cleaning_timings, **cleaning_options)
+            debug_logs.append("🧹 Cleaning step timings (s): " + str({k: round(v, 3) for k, v in cleaning_timings.items()}))
+            cleaned = sanitize_df_for_streamlit(cleaned, copy=False, logs=debug_logs)
+        # Sampled inference; numeric- and date-looking text columns are converted here, once
+        column_types = detect_column_types(cleaned, dataset_key=cache_key, coerce=True)
+        log_loaded_frame(uploaded_file.name, cleaned)
+
+        if dataset_store is not None:
+            try:
+                with stage("dataset_store.save", cleaned):
+                    dataset_store.save(cache_key, cleaned, column_types, name=uploaded_file.name,
+                                       sheet=selected_sheet, options=cleaning_options)
+            except (OSError, pa.ArrowException) as e:
+                debug_logs.append(f"⚠️ Could not save dataset to the local store: {e}")
+        return cleaned, column_types
+
+    return LazyDataset(cache_key, lambda: ingest_cache.get_or_load(cache_key, ingest_upload), DATASET_ARTIFACTS)
+
+def prepare_saved_dataset(manifest) -> LazyDataset:
+    st.sidebar.info(f"📦 **Saved dataset:** `{manifest['name']}`\n\n"
+                    f"📐 **Shape:** {manifest['rows']} rows × {manifest['columns']} columns")
+    cache_key = manifest["key"]
+    def open_saved():
+        with stage("dataset_store.open"):
+            return dataset_store.open(cache_key)
+
+    return LazyDataset(cache_key, lambda: ingest_cache.get_or_load(cache_key, open_saved), DATASET_ARTIFACTS)
+
+def prepare_large_file(data_dir, name) -> LazyDataset:
+    path = os.path.join(data_dir, name)
+    stat = os.stat(path)
+    backend = get_out_of_core_backend(path, stat.st_mtime_ns, stat.st_size)
+    st.sidebar.info(f"🗃️ **Large file:** `{name}`\n\n📦 **Size:** {stat.st_size / 1024 ** 2:,.1f} MB, "
+                    "queried in place with DuckDB")
+    cache_key = make_cache_key(f"{path}:{stat.st_mtime_ns}:{stat.st_size}", None, {"backend": backend.name})
+
+    def open_large_file():
+        # Only a bounded sample is materialized, for previews and row-level charts; it is not cleaned
+        with stage("duckdb.sample") as record:
+            sample = backend.sample(OUT_OF_CORE_SAMPLE_ROWS)
+            record.output(sample)
+        sample = sanitize_df_for_streamlit(sample, copy=False, logs=debug_logs)
+        column_types = detect_column_types(sample, dataset_key=cache_key)
+        log_loaded_frame(f"{name} (sample of {backend.rows:,} rows)", sample)
+        return sample, column_types
+
+    return LazyDataset(cache_key, lambda: ingest_cache.get_or_load(cache_key, open_large_file),
+                       {**DATASET_ARTIFACTS, "backend": lambda dataset: backend})
+
+saved_manifest = None
+large_file = None
+data_dir = os.environ.get("DATA_INSIGHTS_DATA_DIR")
+if uploaded_file is None:
+    saved_datasets = {m["key"]: m for m in dataset_store.list()} if dataset_store is not None else {}
+    if saved_datasets:
+        def describe_saved(key):
+            if key == "None":
+                return "None"
+            m = saved_datasets[key]
+            sheet = f" [{m['sheet']}]" if m["sheet"] else ""
+            return f"{m['name']}{sheet} · {m['rows']:,} rows · {describe_options(m.get('options'))}"
+
+        saved_key = st.sidebar.selectbox("📦 Or Open a Saved Dataset", ["None"] + list(saved_datasets),
+                                         format_func=describe_saved)
+        saved_manifest = saved_datasets.get(saved_key)
+
+    # Files too large for memory are opened from a server-side directory, never uploaded
+    large_files = list_data_files(data_dir) if "duckdb" in available_backends() else []
+    if saved_manifest is None and large_files:
+        large_choice = st.sidebar.selectbox("🗃️ Or Open a Large File (out-of-core)", ["None"] + large_files)
+        large_file = large_choice if large_choice != "None" else None
+
+# --- Pages ---
+def render_main_dashboard(dataset):
+    df_clean = dataset.df
+    column_types = dataset.column_types
+    cache_key = dataset.key
+    backend = dataset.get("backend")
+
+    st.success(f"✅ File loaded successfully! ({backend.rows} rows × {df_clean.shape[1]} columns)")
+    if backend.out_of_core and len(df_clean) < backend.rows:
+        st.caption(f"🗃️ Summaries and aggregated charts cover all {backend.rows:,} rows; the preview and "
+                   f"row-level charts use a random sample of {len(df_clean):,} rows.")
+
+
+    #if "Type" in df.columns:
+        #st.error("❌ 'Type' column STILL exists! You’re using the wrong df!")
+        #st.stop()
+
+
+    st.subheader("\U0001F50D Data Preview")
+    st.dataframe(to_arrow_table(df_clean.head(10)), use_container_width=True)
+    #st.write("Debug columns:", df_clean.columns.tolist())
+
+    st.subheader("\U0001F4CC Dataset Summary")
+    st.markdown(f"- **Rows:** {backend.rows}")
+    st.markdown(f"- **Columns:** {df_clean.shape[1]}")
+    profile = dataset.get("profile")
+    st.dataframe(profile.summary_frame(), use_container_width=True)
+
+
+    st.subheader("\U0001F4C2 Column Type Summary")
+    for kind in COLUMN_KINDS:
+        if kind not in column_types:
+            continue
+        cols = column_types[kind]
+        st.markdown(f"**{kind.replace('_', ' ').title()} Columns:** {', '.join(cols) if cols else '❌ None detected'}")
+    if column_types.get("inferred"):
+        with st.expander("🔎 Inferred column types"):
+            inferred = pd.DataFrame.from_dict(column_types["inferred"], orient="index")
+            st.dataframe(inferred.rename(columns=str.title).rename_axis("Column").reset_index(),
+                         use_container_width=True, hide_index=True)
+
+    st.subheader("\U0001F4C8 Initial Visual Insights")
+    #st.write("Detected column types:", column_types)
+
+    granularity = "auto"
+    if column_types["datetime"] and column_types["numerical"]:
+        granularity = st.radio("🗓️ Time series granularity", GRANULARITY_OPTIONS, format_func=granularity_label,
+                               horizontal=True, key="overview_granularity")
+    generate_overview_charts(df_clean, column_types, profile, dataset_key=cache_key, jobs=jobs, backend=backend,
+                             granularity=granularity)
+
+def render_customizer(dataset):
+    df_clean = dataset.df
+    column_types = dataset.column_types
+    backend = dataset.get("backend")
+
+    st.subheader("⚙️ Customize Your Charts")
+
+    def build_value_counts(col):
+        top_values = backend.value_counts(col, 10).reset_index()
+        top_values.columns = [col, "Count"]
+        fig = px.bar(top_values, x=col, y="Count", color=col,
+                     color_discrete_sequence=px.colors.qualitative.Pastel,
+                     labels={col: col, "Count": "Frequency"},
+                     title=f"Top 10 Values in {col}")
+        fig.update_layout(margin=dict(t=50, b=40), height=400)
+        return fig, None
+
+    def build_histogram(col):
+        fig, reduction = histogram_figure(df_clean, col, nbins=20, backend=backend,
+                                          color_discrete_sequence=['#4F81BD'],
+                                          labels={col: col},
+                                          title=f"Distribution of {col}")
+        fig.update_layout(margin=dict(t=50, b=40), height=400)
+        return fig, reduction
+
+    def render_column_chart(item, result):
+        prefix, col = item
+        fig, reduction = result
+        plotly_chart(fig, use_container_width=True, key=f"{prefix}_{col}")
+        show_reduction(reduction)
+
+    # Every selected column's chart is prepared in the worker pool at once
+    slots = []
+    if column_types["categorical"]:
+        selected_cat = st.multiselect("\U0001F4CA Categorical Columns to Visualize", column_types["categorical"])
+        for col in selected_cat:
+            st.markdown(f"#### `{col}` Value Counts")
+            slots.append((placeholder(), jobs.submit(build_value_counts, col), ("cat", col)))
+
+    if column_types["numerical"]:
+        selected_num = st.multiselect("\U0001F4C9 Numerical Columns to Visualize", column_types["numerical"])
+        for col in selected_num:
+            st.markdown(f"#### `{col}` Histogram")
+            slots.append((placeholder(), jobs.submit(build_histogram, col), ("num", col)))
+
+    fill_as_completed(slots, render_column_chart)
+
+    if column_types["datetime"] and column_types["numerical"]:
+        date_col = st.selectbox("\U0001F4C5 Choose Date Column", column_types["datetime"])
+        value_col = st.selectbox("\U0001F4B0 Choose Numeric Column to Plot", column_types["numerical"])
+        granularity = st.selectbox("🗓️ Granularity", GRANULARITY_OPTIONS, format_func=granularity_label)
+        rollups = get_rollups(date_col, column_types["numerical"], backend=backend, dataset_key=dataset.key)
+        agg, freq, reduction = rollups.frame(value_col, granularity)
+        fig = px.line(agg, x=date_col, y=value_col,
+                      title=f"{value_col} per {granularity_label(freq)} ({date_col})",
+                      markers=True)
+        fig.update_traces(line=dict(color="#E26A6A", width=2))
+        fig.update_layout(margin=dict(t=50, b=40), height=400)
+        plotly_chart(fig, use_container_width=True)
+        show_reduction(reduction)
+
+def render_chart_builder(dataset):
+    df_clean = dataset.df
+    column_types = dataset.column_types
+    cache_key = dataset.key
+    backend = dataset.get("backend")
+
+    st.subheader("🛠️ Build Your Own Chart")
+
+    col1, col2, col3, col4 = st.columns(4)
+    x_axis = col1.selectbox("X-Axis", df_clean.columns)
+    y_axis = col2.multiselect("Y-Axis", ["None"] + list(df_clean.columns))
+    # High-cardinality labels would mean one legend entry per value
+    color_choices = [c for c in column_types["categorical"] if c not in column_types.get("high_cardinality", [])]
+    color_by = col3.selectbox("Color By", ["None"] + color_choices)
+
+    # Suggest
+    chart_type_suggestion = suggest_chart_type(df_clean, x_axis, y_axis if y_axis else None)
+    st.markdown(f"\U0001F4A1 **Suggested Chart:** `{chart_type_suggestion}`")
+
+    chart_options = ["Bar", "Histogram", "Scatter", "Line", "Pie", "Area", "Bubble", "Waterfall"]
+    chart_type = col4.selectbox("Chart Type", chart_options, index=chart_options.index(chart_type_suggestion))
+
+    fig = None
+    reduction = None
+    color_col = color_by if color_by not in ("None", x_axis) else None
+    y_numeric = [col for col in y_axis if col != "None" and is_numeric_dtype(df_clean[col])]
+    if chart_type in ("Bar", "Waterfall") and len(y_numeric) < len([c for c in y_axis if c != "None"]):
+        st.warning("⚠️ Only numeric Y-axis columns can be summed; other columns were skipped.")
+
+    if chart_type == "Bar":
+        grouped = get_grouped_sums(cache_key, (x_axis, color_col) if color_col else (x_axis,),
+                                   tuple(y_numeric), backend)
+        if y_numeric:
+            data = grouped.frame()
+            fig = px.bar(data, x=x_axis, y=y_numeric,
+                         color=color_col,
+                         title=f"Bar Chart: {y_axis} by {x_axis}")
+        else:
+            data = grouped.counts.sort_values(ascending=False).reset_index()
+            fig = px.bar(data, x=x_axis, y="Count",
+                         color=color_col,
+                         title=f"Bar Chart of {x_axis}")
+
+    elif chart_type == "Histogram":
+        fig, reduction = histogram_figure(df_clean, x_axis, backend=backend,
+                                          color=color_by if color_by != "None" else None,
+                                          nbins=20,
+                                          title=f"Histogram of {x_axis}")
+
+    elif chart_type == "Scatter" and y_axis != "None":
+        method, scatter_data, reduction = reduce_scatter(df_clean, x_axis, y_axis,
+                                                         color=color_by if color_by != "None" else None)
+        if method == "density":
+            fig = density_figure(*scatter_data, x=x_axis, y=y_axis[0],
+                                 title=f"Scatter Density: {y_axis} vs {x_axis}")
+            add_linear_trend(fig, df_clean, x_axis, y_axis[0])
+        elif is_datetime(df_clean[x_axis]) or is_datetime(df_clean[y_axis]):
+            st.warning("⚠️ Trendline not supported for datetime axes.")
+            fig = px.scatter(scatter_data, x=x_axis, y=y_axis,
                              color=color_by if color_by != "None" else None,
-                             title=f"Bar Chart of {x_axis}")
-
-        elif chart_type == "Histogram":
-            fig = px.histogram(df_clean, x=x_axis,
-                               color=color_by if color_by != "None" else None,
-                               nbins=20,
-                               title=f"Histogram of {x_axis}")
-
-        elif chart_type == "Scatter" and y_axis != "None":
-            if is_datetime(df_clean[x_axis]) or is_datetime(df_clean[y_axis]):
-                st.warning("⚠️ Trendline not supported for datetime axes.")
-                fig = px.scatter(df_clean, x=x_axis, y=y_axis,
-                                 color=color_by if color_by != "None" else None,
-                                 title=f"Scatter Plot: {y_axis} vs {x_axis}")
-            else:
-                fig = px.scatter(df_clean, x=x_axis, y=y_axis,
-                                 color=color_by if color_by != "None" else None,
-                                 trendline="ols",
-                                 title=f"Scatter Plot: {y_axis} vs {x_axis}")
-
-        elif chart_type == "Line" and y_axis != "None":
-            fig = px.line(df_clean, x=x_axis, y=y_axis,
-                          color=color_by if color_by != "None" else None,
-                          title=f"Line Chart: {y_axis} over {x_axis}")
-
-        elif chart_type == "Pie":
-            pie_data = df_clean[x_axis].value_counts().reset_index()
-            pie_data.columns = [x_axis, "Count"]
-            fig = px.pie(pie_data, names=x_axis, values="Count",
-                         title=f"Pie Chart of {x_axis}")
-
-        elif chart_type == "Area" and y_axis != "None":
-            fig = px.area(df_clean, x=x_axis, y=y_axis,
-                          color=color_by if color_by != "None" else None,
-                          title=f"Area Chart: {y_axis} over {x_axis}")
-
-        elif chart_type == "Bubble":
-            if isinstance(y_axis, list) or y_axis == "None":
-                st.error("Bubble charts require a single numeric Y-axis column.")
-            elif not is_numeric_dtype(df_clean[y_axis]):
-                st.error("Y-axis must be numeric for bubble chart sizing.")
+                             title=f"Scatter Plot: {y_axis} vs {x_axis}")
+        else:
+            # One closed-form fit per Y column and colour group, in parallel, while the figure is built
+            color = color_by if color_by != "None" else None
+            groups = df_clean.groupby(color, observed=True, sort=False) if color else [(None, df_clean)]
+            fits = [(group, jobs.submit(linear_trend, part, x_axis, y))
+                    for group, part in groups for y in y_axis if y != "None"]
+            fig = px.scatter(scatter_data, x=x_axis, y=y_axis,
+                             color=color,
+                             title=f"Scatter Plot: {y_axis} vs {x_axis}")
+            # Each group's line takes its points' colour where the figure has one trace per group
+            group_colors = {trace.name: trace.marker.color for trace in fig.data}
+            trend_colors = px.colors.qualitative.Dark2
+            for i, (group, fit) in enumerate(fits):
+                add_trend_trace(fig, fit.result(), group=group,
+                                color=group_colors.get(str(group), trend_colors[i % len(trend_colors)]))
+
+    elif chart_type == "Line" and y_axis != "None":
+        line_data, reduction = reduce_lines(df_clean, x_axis, y_axis,
+                                            color=color_by if color_by != "None" else None)
+        fig = px.line(line_data, x=x_axis, y=y_axis,
+                      color=color_by if color_by != "None" else None,
+                      title=f"Line Chart: {y_axis} over {x_axis}")
+
+    elif chart_type == "Pie":
+        pie_data = backend.value_counts(x_axis).reset_index()
+        pie_data.columns = [x_axis, "Count"]
+        fig = px.pie(pie_data, names=x_axis, values="Count",
+                     title=f"Pie Chart of {x_axis}")
+
+    elif chart_type == "Area" and y_axis != "None":
+        area_data, reduction = reduce_lines(df_clean, x_axis, y_axis,
+                                            color=color_by if color_by != "None" else None)
+        fig = px.area(area_data, x=x_axis, y=y_axis,
+                      color=color_by if color_by != "None" else None,
+                      title=f"Area Chart: {y_axis} over {x_axis}")
+
+    elif chart_type == "Bubble":
+        # The Y column also sizes the bubbles, so exactly one is needed
+        bubble_y = [c for c in y_axis if c != "None"]
+        if len(bubble_y) != 1:
+            st.error("Bubble charts require a single numeric Y-axis column.")
+        elif not is_numeric_dtype(df_clean[bubble_y[0]]):
+            st.error("Y-axis must be numeric for bubble chart sizing.")
+        else:
+            bubble_y = bubble_y[0]
+            bubble_data = stratified_sample(df_clean, color_by if color_by != "None" else None)
+            reduction = Reduction("points (sample)", len(df_clean), len(bubble_data))
+            fig = px.scatter(bubble_data, x=x_axis, y=bubble_y,
+                            size=bubble_y,
+                            color=color_by if color_by != "None" else None,
+                            title=f"Bubble Chart: {bubble_y} vs {x_axis}")
+
+    elif chart_type == "Waterfall" and y_numeric:
+        data = get_grouped_sums(cache_key, (x_axis,), tuple(y_numeric), backend).frame()
+        fig = go.Figure(go.Waterfall(
+            x=data[x_axis],
+            y=data[y_numeric[0]],
+            name="Waterfall Chart"
+        ))
+        fig.update_layout(title=f"Waterfall Chart: {y_axis} by {x_axis}")
+
+    if fig:
+        fig.update_layout(margin=dict(t=50, b=40), height=500)
+        plotly_chart(fig, use_container_width=True)
+        show_reduction(reduction)
+
+def render_waterfall(dataset):
+    df_clean = dataset.df
+    cache_key = dataset.key
+    backend = dataset.get("backend")
+
+    st.subheader("📉 Waterfall Analysis")
+
+    group_col = st.selectbox("🧩 Select Grouping Column (Optional)", ["None"] + list(df_clean.columns))
+
+    numeric_cols = [col for col in df_clean.columns if is_numeric_dtype(df_clean[col])]
+
+    if group_col != "None":
+        # Sums for every group are computed once; picking a value is then a row lookup
+        grouped = get_grouped_sums(cache_key, (group_col,), tuple(numeric_cols), backend)
+        selected_value = st.selectbox(f"🔍 Select a value from `{group_col}`", grouped.groups)
+        group_sums = grouped.lookup(selected_value)
+    else:
+        group_sums = None
+
+    selected_cols = st.multiselect("📊 Select Numeric Columns for Waterfall Steps (in order)", numeric_cols)
+
+    if selected_cols:
+        col1, col2 = st.columns([2, 1])
+        col_order = col1.text_area("✏️ Step Labels (One per line)", "\n".join(selected_cols)).splitlines()
+        measures = col2.multiselect("📏 Step Type (Match Order)", ["relative", "total"], default=["relative"] * len(selected_cols))
+
+        if len(col_order) != len(selected_cols) or len(measures) != len(selected_cols):
+            st.error("❗ Labels and Measures must match the number of selected columns.")
+        else:
+            if group_sums is not None:
+                values = [group_sums[col] for col in selected_cols]
             else:
-                fig = px.scatter(df_clean, x=x_axis, y=y_axis,
-                                size=y_axis,
-                                color=color_by if color_by != "None" else None,
-                                title=f"Bubble Chart: {y_axis} vs {x_axis}")
+                totals = backend.column_sums(selected_cols)
+                values = [totals[col] for col in selected_cols]
 
-        elif chart_type == "Waterfall" and y_axis != "None":
-            data = df_clean.groupby(x_axis)[y_axis].sum().reset_index()
             fig = go.Figure(go.Waterfall(
-                x=data[x_axis],
-                y=data[y_axis],
-                name="Waterfall Chart"
+                name="Dynamic Waterfall",
+                orientation="v",
+                measure=measures,
+                x=col_order,
+                y=values,
+                connector={"line": {"color": "gray"}}
             ))
-            fig.update_layout(title=f"Waterfall Chart: {y_axis} by {x_axis}")
-
-        if fig:
-            fig.update_layout(margin=dict(t=50, b=40), height=500)
-            st.plotly_chart(fig, use_container_width=True)
-
-    elif page == "Waterfall Analysis":
-        st.subheader("📉 Waterfall Analysis")
 
-        group_col = st.selectbox("🧩 Select Grouping Column (Optional)", ["None"] + list(df_clean.columns))
+            title_suffix = f" for `{selected_value}`" if group_col != "None" else ""
+            fig.update_layout(
+                title=f"Waterfall Chart{title_suffix}",
+                showlegend=False,
+                height=500,
+                margin=dict(t=50, b=40)
+            )
+
+            plotly_chart(fig, use_container_width=True)
+
+def render_about(dataset):
+    st.title("About This App")
+    st.markdown("""
+    **Data Insights Dashboard** is a Streamlit-based web application that enables users to upload, explore, and visualize HR datasets with ease.
+
+    **Features:**
+    - 📁 Upload Excel (.xlsx) or CSV files
+    - 🧹 Data cleaning (trims spaces, fixes dates, fills missing values)
+    - 📈 Auto-generated visual insights (Main Dashboard)
+    - ⚙️ Chart Customizer: histograms, bar charts, line charts, and more
+    - 🛠️ Build Your Own Chart with smart suggestions
+    - 📉 Waterfall analysis (with totals and labels)
+    - ✅ No manual setup or code required
+    - ⬇️ Export cleaned data as CSV (plain, gzip or zstd), .xlsx or Parquet
+
+    Developed using Python, Pandas, and Plotly.
+
+    Project Made by: AL Damasco
+    """)
+
+    st.markdown("---")
+    st.subheader("🗄️ Ingest Cache")
+    st.table(pd.Series(ingest_cache.summary(), name="Value").astype(str))
+
+    if debug_logs:
+        st.markdown("---")
+        st.subheader("🪛 Debug Info")
+        for log in debug_logs:
+            st.text(log)
+
+# --- Export ---
+@st.cache_resource
+def get_export_store() -> ExportStore:
+    root = default_export_dir()
+    max_mb = int(os.environ.get("DATA_INSIGHTS_EXPORT_MB", "2048"))
+    max_hours = float(os.environ.get("DATA_INSIGHTS_EXPORT_HOURS", "24"))
+    url_prefix = static_url_prefix(root) if st.get_option("server.enableStaticServing") else None
+    return ExportStore(root, max_bytes=max_mb * 1024 ** 2,
+                       max_age_seconds=max_hours * 3600 if max_hours > 0 else None, url_prefix=url_prefix)
+
+@st.cache_resource
+def get_export_pool():
+    # Separate from the chart pool, so a long export never holds up a page's charts
+    return create_worker_pool(EXPORT_WORKERS, name="export-worker")
+
+if "export_jobs" not in st.session_state:
+    st.session_state.export_jobs = {}
+
+@st.fragment(run_every=1)
+def export_progress(job_key):
+    # Polls only while this session has an export running; other widgets stay responsive
+    if st.session_state.export_jobs[job_key].done():
+        st.rerun()
+    st.caption("⏳ Writing the export in the background…")
+
+def render_export(dataset):
+    export_store = get_export_store()
+    with st.sidebar.expander("⬇️ Export Cleaned Data"):
+        fmt = st.selectbox("Format", available_formats(), format_func=lambda f: EXPORT_FORMATS[f].label,
+                           key="export_format")
+        spec = EXPORT_FORMATS[fmt]
+        job_key = (dataset.key, fmt)
+        job = st.session_state.export_jobs.get(job_key)
+        if job is not None and job.done():
+            del st.session_state.export_jobs[job_key]
+            if job.exception() is not None:
+                st.error(f"❌ Export failed: {job.exception()}")
+            job = None
+
+        # Nothing is generated until asked for; a finished export is reused by every session
+        if export_store.has(dataset.key, fmt):
+            export_store.touch(dataset.key, fmt)
+            label = f"⬇️ Download {spec.label} ({export_store.size(dataset.key, fmt) / 1024 ** 2:,.1f} MB)"
+            url = export_store.url(dataset.key, fmt)
+            if url is not None:
+                # Streamed from disk by Streamlit's static file route
+                st.markdown(f'<a href="{url}" download="cleaned_data{spec.extension}">{label}</a>',
+                            unsafe_allow_html=True)
+            else:
+                # download_button holds the whole file in memory while it is offered
+                st.download_button(label, data=lambda: export_store.read(dataset.key, fmt),
+                                   file_name="cleaned_data" + spec.extension, mime=spec.mime, on_click="ignore")
+        elif job is not None:
+            export_progress(job_key)
+        elif st.button(f"📦 Prepare {spec.label} export"):
+            backend = dataset.get("backend")
+            if fmt == "xlsx" and backend.rows > EXCEL_MAX_ROWS:
+                st.error(f"❌ Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; use CSV or Parquet instead.")
+            else:
+                st.session_state.export_jobs[job_key] = get_export_pool().submit(
+                    export_store.export, dataset.key, fmt, backend.record_batches(EXPORT_CHUNK_ROWS))
+                st.rerun()
+
+PAGES = {
+    "Main Dashboard": Page(render_main_dashboard, needs=("df", "column_types", "backend", "profile")),
+    "Customize Your Chart": Page(render_customizer, needs=("df", "column_types", "backend")),
+    "Build Your Own Chart": Page(render_chart_builder, needs=("df", "column_types", "backend")),
+    "Waterfall Analysis": Page(render_waterfall, needs=("df", "backend")),
+    "About": Page(render_about),
+}
 
-        if group_col != "None":
-            selected_value = st.selectbox(f"🔍 Select a value from `{group_col}`", df_clean[group_col].dropna().unique())
-            filtered_df = df_clean[df_clean[group_col] == selected_value]
-        else:
-            filtered_df = df_clean
+# Every stage() below, in app.py and in utils, records into this rerun's recorder
+recorder = start_rerun(
+    label=page,
+    measure_memory=st.session_state.get("perf_measure_memory", False),
+    measure_figures=st.session_state.get("perf_measure_figures", False),
+    profile=st.session_state.pop("perf_profile_next", False),
+)
 
-        numeric_cols = [col for col in filtered_df.columns if is_numeric_dtype(filtered_df[col])]
-        selected_cols = st.multiselect("📊 Select Numeric Columns for Waterfall Steps (in order)", numeric_cols)
+def finish_rerun():
+    # Stops the profiler and keeps the record before touching Streamlit, which refuses
+    # further calls once st.rerun() has been requested
+    recorder.finish()
+    perf_history.append(recorder)
+    render_performance_panel(recorder, perf_history)
+
+# Finished however the rerun ends, so a requested profile is always stopped and reported;
+# st.stop() would hide the panel, so the pages below end without it
+try:
+    dataset = None
+    if uploaded_file is not None:
+        dataset = prepare_uploaded_file(uploaded_file)
+    elif saved_manifest is not None:
+        dataset = prepare_saved_dataset(saved_manifest)
+    elif large_file is not None:
+        dataset = prepare_large_file(data_dir, large_file)
+
+    # Pin the dataset this session is viewing; the one it just left becomes evictable
+    active_key = dataset.key if dataset is not None else None
+    previous_key = st.session_state.get("active_dataset_key")
+    if active_key != previous_key:
+        if previous_key is not None:
+            ingest_cache.release(previous_key, session_id)
+        st.session_state.active_dataset_key = active_key
+    if active_key is not None:
+        ingest_cache.acquire(active_key, session_id)
+
+    # Only the artifacts the active page declares are computed on this rerun
+    current_page = PAGES[page]
+    if current_page.needs and dataset is None:
+        st.warning("⚠️ Please upload a file to begin.")
+    else:
+        if current_page.needs:
+            with stage("load artifacts: " + ", ".join(current_page.needs)):
+                dataset.prefetch(current_page.needs)
 
-        if selected_cols:
-            col1, col2 = st.columns([2, 1])
-            col_order = col1.text_area("✏️ Step Labels (One per line)", "\n".join(selected_cols)).splitlines()
-            measures = col2.multiselect("📏 Step Type (Match Order)", ["relative", "total"], default=["relative"] * len(selected_cols))
+        with stage(f"render {page}"):
+            current_page.render(dataset)
 
-            if len(col_order) != len(selected_cols) or len(measures) != len(selected_cols):
-                st.error("❗ Labels and Measures must match the number of selected columns.")
-            else:
-                values = [filtered_df[col].sum() for col in selected_cols]
-
-                fig = go.Figure(go.Waterfall(
-                    name="Dynamic Waterfall",
-                    orientation="v",
-                    measure=measures,
-                    x=col_order,
-                    y=values,
-                    connector={"line": {"color": "gray"}}
-                ))
-
-                title_suffix = f" for `{selected_value}`" if group_col != "None" else ""
-                fig.update_layout(
-                    title=f"Waterfall Chart{title_suffix}",
-                    showlegend=False,
-                    height=500,
-                    margin=dict(t=50, b=40)
-                )
-
-                st.plotly_chart(fig, use_container_width=True)
-
-    elif page == "About":
-        st.title("About This App")
-        st.markdown("""
-        **Data Insights Dashboard** is a Streamlit-based web application that enables users to upload, explore, and visualize HR datasets with ease.
-
-        **Features:**
-        - 📁 Upload Excel (.xlsx) or CSV files
-        - 🧹 Data cleaning (trims spaces, fixes dates, fills missing values)
-        - 📈 Auto-generated visual insights (Main Dashboard)
-        - ⚙️ Chart Customizer: histograms, bar charts, line charts, and more
-        - 🛠️ Build Your Own Chart with smart suggestions
-        - 📉 Waterfall analysis (with totals and labels)
-        - ✅ No manual setup or code required
-        - ~~⬇️ Export cleaned data as .csv or .xlsx~~
-
-        Developed using Python, Pandas, and Plotly.
-                    
-        Project Made by: AL Damasco
-        """)
-
-        if debug_logs:
-            st.markdown("---")
-            st.subheader("🪛 Debug Info")
-            for log in debug_logs:
-                st.text(log)
-
-    #Export (soon)
-    #st.sidebar.download_button(
-        #"⬇️ Download Cleaned Data (CSV)",
-        #data=df_clean.to_csv(index=False).encode('utf-8'),
-        #file_name="cleaned_data.csv",
-        #mime="text/csv"
-    #)
-
-    #xlsx_buffer = io.BytesIO()
-    #with pd.ExcelWriter(xlsx_buffer, engine='xlsxwriter') as writer:
-        #df_clean.to_excel(writer, index=False, sheet_name="CleanedData")
-        #st.sidebar.download_button(
-            #"⬇️ Download Cleaned Data (XLSX)",
-            #data=xlsx_buffer.getvalue(),
-            #file_name="cleaned_data.xlsx",
-            #mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        #)
\ No newline at end of file
+        if dataset is not None:
+            render_export(dataset)
+finally:
+    finish_rerun()
@@ -0,0 +1,79 @@
+"""Compare Excel reader engines on a generated multi-sheet workbook.
+
+    python -m benchmarks.bench_excel_engines --rows 200000 --sheets 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.excel_ingest import WorkbookIngest, available_engines, create_sheet_pool, read_sheet
+
+
+def write_workbook(path: str, rows: int, sheets: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for i in range(sheets):
+            pd.DataFrame({
+                "Employee ID": np.arange(rows),
+                "Department": rng.choice(["HR", "Sales", "IT", "Finance", "Ops"], rows),
+                "Salary": rng.normal(60000, 15000, rows).round(2),
+                "Age": rng.integers(20, 65, rows),
+                "Start Date": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), "D"),
+            }).to_excel(writer, sheet_name=f"Sheet{i + 1}", index=False)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sheets", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        print(f"Writing {args.sheets} sheets x {args.rows:,} rows ...")
+        write_workbook(path, args.rows, args.sheets)
+        print(f"Workbook size: {os.path.getsize(path) / 1024 ** 2:.1f} MB\n")
+
+        sheet_names = pd.ExcelFile(path).sheet_names
+        results = []
+        results.append(("ExcelFile + read_excel (app before)", timed(
+            lambda: (pd.ExcelFile(path).sheet_names, pd.read_excel(path, sheet_name=sheet_names[0])))))
+
+        for engine in available_engines():
+            results.append((f"{engine}: first sheet", timed(lambda: read_sheet(path, sheet_names[0], engine))))
+            results.append((f"{engine}: all sheets, sequential", timed(
+                lambda: [read_sheet(path, name, engine) for name in sheet_names])))
+
+            with open(path, "rb") as f:
+                data = f.read()
+            pool = create_sheet_pool()
+            # Warm the workers up so process start-up isn't counted
+            for future in [pool.submit(time.sleep, 0.5) for _ in range(len(sheet_names))]:
+                future.result()
+
+            def pooled():
+                workbook = WorkbookIngest(data, f"bench-{engine}", pool=pool, engine=engine)
+                for name in sheet_names:
+                    workbook.read(name)
+                workbook.close()
+
+            results.append((f"{engine}: all sheets, process pool", timed(pooled)))
+            pool.shutdown()
+
+    width = max(len(name) for name, _ in results)
+    for name, seconds in results:
+        print(f"{name:<{width}}  {seconds:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Time the upload-to-chart pipeline headless on generated HR datasets.
+
+    python -m benchmarks.bench_pipeline --sizes 10000 100000 1000000 --format csv --output results.json
+
+Each size runs in its own subprocess so peak RSS is measured per size. Streamlit
+calls are stubbed out: charts are captured instead of sent to a browser, and their
+serialized size is reported as the figure payload.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.hr_dataset import XLSX_MAX_ROWS, add_generator_args, generate_hr_dataset, generator_kwargs, write_dataset
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+class StubStreamlit:
+    """Replaces the Streamlit calls the chart code makes, keeping the figures."""
+
+    def __init__(self):
+        self.figures = []
+        self.session_state = {}
+
+    def plotly_chart(self, fig, *args, **kwargs):
+        self.figures.append(fig)
+
+    def button(self, *args, **kwargs):
+        return False
+
+    def noop(self, *args, **kwargs):
+        return None
+
+    @contextlib.contextmanager
+    def patch(self):
+        import streamlit as st
+        patches = [mock.patch.object(st, "plotly_chart", self.plotly_chart),
+                   mock.patch.object(st, "button", self.button),
+                   mock.patch.object(st, "session_state", self.session_state)]
+        for name in ("markdown", "caption", "warning", "subheader", "write", "rerun"):
+            patches.append(mock.patch.object(st, name, self.noop))
+        with contextlib.ExitStack() as stack:
+            for patch in patches:
+                stack.enter_context(patch)
+            yield self
+
+    def payload_bytes(self) -> int:
+        return sum(len(fig.to_json()) for fig in self.figures)
+
+
+class StageTimer:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run(self, name: str, fn, rows_in: int | None = None):
+        if self.trace_memory:
+            tracemalloc.start()
+        # ru_maxrss only ever rises, so a stage is charged with how far it pushed the peak;
+        # a stage that stays under an earlier stage's peak reports 0
+        peak_before = peak_rss_mb()
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        peak_after = peak_rss_mb()
+        record = {"stage": name, "seconds": round(seconds, 4), "rows_in": rows_in,
+                  "peak_rss_growth_mb": None if peak_after is None else round(peak_after - peak_before, 1)}
+        if isinstance(result, pd.DataFrame):
+            record["rows_out"] = len(result)
+        if self.trace_memory:
+            record["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+            tracemalloc.stop()
+        self.stages.append(record)
+        return result
+
+
+def run_single(rows: int, fmt: str, trace_memory: bool, generator: dict) -> dict:
+    # Imported here so the parent process stays light and each size starts cold
+    from utils.chart_suggester import suggest_chart_type
+    from utils.charts import generate_overview_charts
+    from utils.column_detection import detect_column_types
+    from utils.csv_ingest import read_csv_streaming
+    from utils.data_cleaning import clean_data, sanitize_df_for_streamlit
+    from utils.excel_ingest import preferred_engine, read_sheet
+    from utils.profiling import profile_dataframe
+
+    timer = StageTimer(trace_memory)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"hr.{fmt}")
+        df = generate_hr_dataset(rows, **generator)
+        write_dataset(df, path)
+        file_mb = os.path.getsize(path) / 1024 ** 2
+        del df
+
+        if fmt == "csv":
+            raw = timer.run("read_csv", lambda: pd.read_csv(path))
+
+            def streaming():
+                with open(path, "rb") as f:
+                    return read_csv_streaming(f)
+
+            timer.run("read_csv_streaming (read + clean + sanitize)", streaming, rows)
+        else:
+            engine = preferred_engine()
+            raw = timer.run(f"read_excel ({engine})", lambda: read_sheet(path, 0, engine))
+
+    timings = {}
+    df = timer.run("clean_data", lambda: clean_data(raw, copy=False, timings=timings), len(raw))
+    timer.stages[-1]["steps"] = {step: round(seconds, 4) for step, seconds in timings.items()}
+    del raw
+    df = timer.run("sanitize_df_for_streamlit", lambda: sanitize_df_for_streamlit(df, copy=False), len(df))
+    column_types = timer.run("detect_column_types", lambda: detect_column_types(df), len(df))
+    skip_top = column_types.get("identifier", []) + column_types.get("text", [])
+    profile = timer.run("profile_dataframe", lambda: profile_dataframe(df, skip_top=skip_top), len(df))
+
+    stub = StubStreamlit()
+    with stub.patch():
+        timer.run("generate_overview_charts",
+                  lambda: generate_overview_charts(df, column_types, profile), len(df))
+    timer.stages[-1]["figures"] = len(stub.figures)
+    timer.stages[-1]["figure_bytes"] = stub.payload_bytes()
+
+    numeric = column_types.get("numerical", [])
+    pairs = [(x, y) for x in df.columns for y in [None] + numeric[:1] if x != y]
+    timer.run("suggest_chart_type", lambda: [suggest_chart_type(df, x, y) for x, y in pairs], len(df))
+    timer.stages[-1]["calls"] = len(pairs)
+
+    return {"rows": rows, "format": fmt, "file_mb": round(file_mb, 1), "columns": df.shape[1],
+            "stages": timer.stages, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_size(rows: int, args) -> dict:
+    if args.format == "xlsx" and rows > XLSX_MAX_ROWS:
+        return {"rows": rows, "format": args.format, "skipped": f"xlsx holds at most {XLSX_MAX_ROWS:,} rows"}
+
+    cmd = [sys.executable, "-m", "benchmarks.bench_pipeline", "--single", str(rows),
+           "--format", args.format, "--columns", ",".join(f"{k}={v}" for k, v in args.columns.items()),
+           "--null-rate", str(args.null_rate), "--whitespace-rate", str(args.whitespace_rate),
+           "--date-formats", args.date_formats, "--seed", str(args.seed)]
+    if args.cardinality is not None:
+        cmd += ["--cardinality", str(args.cardinality)]
+    if args.trace_memory:
+        cmd.append("--trace-memory")
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"rows": rows, "format": args.format, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_result(result: dict):
+    if "stages" not in result:
+        print(f"{result['rows']:>12,} rows  {result.get('skipped') or result.get('error')}")
+        return
+    print(f"{result['rows']:>12,} rows  {result['file_mb']:.1f} MB {result['format']}  "
+          f"peak RSS {result['peak_rss_mb']} MB")
+    width = max(len(stage["stage"]) for stage in result["stages"])
+    for stage in result["stages"]:
+        extra = f"  {stage['figure_bytes'] / 1024:,.0f} KB of figures" if "figure_bytes" in stage else ""
+        print(f"    {stage['stage']:<{width}}  {stage['seconds']:9.3f} s  "
+              f"peak RSS +{stage['peak_rss_growth_mb']} MB{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+    parser.add_argument("--output", default="bench_pipeline.json")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report tracemalloc peaks per stage (slows the run down)")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    add_generator_args(parser)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        # Child process: keep library chatter off stdout, then print one JSON line
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_single(args.single, args.format, args.trace_memory, generator_kwargs(args))
+        print(json.dumps(result))
+        return
+
+    results = []
+    for rows in args.sizes:
+        result = run_size(rows, args)
+        print_result(result)
+        results.append(result)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "generator": generator_kwargs(args),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Generate a synthetic HR dataset for benchmarking the upload-to-chart pipeline.
+
+    python -m benchmarks.hr_dataset --rows 1000000 --out hr.csv
+    python -m benchmarks.hr_dataset --rows 100000 --columns numeric=6,categorical=3,date=1,text=1 --out hr.xlsx
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+XLSX_MAX_ROWS = 1_048_575  # one row of the sheet is taken by the header
+
+DEFAULT_COLUMNS = {"numeric": 4, "categorical": 4, "date": 2, "text": 1}
+DEFAULT_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+
+NUMERIC_COLUMNS = (
+    ("Salary", lambda rng, n: rng.normal(60000, 15000, n).round(2)),
+    ("Age", lambda rng, n: rng.integers(20, 65, n)),
+    ("Bonus", lambda rng, n: rng.exponential(2500, n).round(2)),
+    ("Performance Score", lambda rng, n: rng.integers(1, 6, n)),
+    ("Years of Service", lambda rng, n: rng.integers(0, 40, n)),
+    ("Overtime Hours", lambda rng, n: rng.gamma(2.0, 4.0, n).round(1)),
+)
+CATEGORICAL_COLUMNS = (
+    ("Department", ["HR", "Sales", "IT", "Finance", "Operations", "Legal", "Marketing", "R&D"]),
+    ("Location", ["London", "Paris", "Berlin", "Madrid", "Dublin", "Warsaw", "Lisbon", "Vienna"]),
+    ("Gender", ["Female", "Male", "Non-binary"]),
+    ("Job Title", ["Analyst", "Engineer", "Manager", "Director", "Associate", "Consultant"]),
+    ("Employment Type", ["Full-time", "Part-time", "Contract", "Intern"]),
+)
+DATE_COLUMNS = ("Start Date", "Last Review Date", "Birth Date")
+TEXT_COLUMNS = ("Comments", "Manager Notes")
+TEXT_WORDS = ("great", "needs", "support", "team", "player", "exceeds", "targets", "late",
+              "reliable", "training", "promotion", "review", "client", "feedback", "remote")
+
+
+def _labels(base: list, cardinality: int | None) -> list:
+    # Pad the base labels with numbered variants when a higher cardinality is asked for
+    if not cardinality or cardinality <= len(base):
+        return base[:cardinality] if cardinality else base
+    return base + [f"{base[i % len(base)]} {i // len(base) + 1}" for i in range(cardinality - len(base))]
+
+
+def _add_whitespace(values: np.ndarray, rng, rate: float) -> np.ndarray:
+    if rate <= 0:
+        return values
+    noisy = rng.random(len(values)) < rate
+    values = values.astype(object)
+    values[noisy] = [f"  {v} " for v in values[noisy]]
+    return values
+
+
+def _add_nulls(series: pd.Series, rng, rate: float) -> pd.Series:
+    if rate <= 0:
+        return series
+    return series.mask(rng.random(len(series)) < rate)
+
+
+def generate_hr_dataset(rows: int, columns: dict | None = None, cardinality: int | None = None,
+                        null_rate: float = 0.02, whitespace_rate: float = 0.05,
+                        date_formats=DEFAULT_DATE_FORMATS, seed: int = 0) -> pd.DataFrame:
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    rng = np.random.default_rng(seed)
+    data = {"Employee ID": np.arange(1, rows + 1)}
+
+    for i in range(columns["numeric"]):
+        name, make = NUMERIC_COLUMNS[i % len(NUMERIC_COLUMNS)]
+        name = name if i < len(NUMERIC_COLUMNS) else f"{name} {i // len(NUMERIC_COLUMNS) + 1}"
+        data[name] = _add_nulls(pd.Series(make(rng, rows)), rng, null_rate)
+
+    for i in range(columns["categorical"]):
+        name, base = CATEGORICAL_COLUMNS[i % len(CATEGORICAL_COLUMNS)]
+        name = name if i < len(CATEGORICAL_COLUMNS) else f"{name} {i // len(CATEGORICAL_COLUMNS) + 1}"
+        labels = np.asarray(_labels(base, cardinality), dtype=object)
+        values = labels[rng.integers(0, len(labels), rows)]
+        data[name] = _add_nulls(pd.Series(_add_whitespace(values, rng, whitespace_rate)), rng, null_rate)
+
+    for i in range(columns["date"]):
+        name = DATE_COLUMNS[i % len(DATE_COLUMNS)]
+        name = name if i < len(DATE_COLUMNS) else f"{name} {i // len(DATE_COLUMNS) + 1}"
+        # Format each distinct day once and index into it; strftime per row is far too slow at 10M
+        days = pd.date_range("2010-01-01", periods=5000, freq="D")
+        formatted = np.asarray(days.strftime(date_formats[i % len(date_formats)]), dtype=object)
+        data[name] = _add_nulls(pd.Series(formatted[rng.integers(0, len(days), rows)]), rng, null_rate)
+
+    for i in range(columns["text"]):
+        name = TEXT_COLUMNS[i % len(TEXT_COLUMNS)]
+        name = name if i < len(TEXT_COLUMNS) else f"{name} {i // len(TEXT_COLUMNS) + 1}"
+        words = np.asarray(TEXT_WORDS, dtype=object)
+        text = words[rng.integers(0, len(words), rows)] + " " + words[rng.integers(0, len(words), rows)] \
+            + " " + pd.Series(rng.integers(0, 10_000, rows)).astype(str).to_numpy(dtype=object)
+        data[name] = _add_nulls(pd.Series(text), rng, null_rate)
+
+    return pd.DataFrame(data)
+
+
+def write_dataset(df: pd.DataFrame, path: str) -> str:
+    if path.endswith(".xlsx"):
+        if len(df) > XLSX_MAX_ROWS:
+            raise ValueError(f"xlsx sheets hold at most {XLSX_MAX_ROWS:,} data rows")
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def parse_columns(spec: str) -> dict:
+    columns = {}
+    for part in filter(None, spec.split(",")):
+        kind, _, count = part.partition("=")
+        if kind not in DEFAULT_COLUMNS:
+            raise argparse.ArgumentTypeError(f"unknown column kind {kind!r}; expected one of {list(DEFAULT_COLUMNS)}")
+        columns[kind] = int(count)
+    return columns
+
+
+def add_generator_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--columns", type=parse_columns, default={},
+                        help="column mix, e.g. numeric=4,categorical=4,date=2,text=1")
+    parser.add_argument("--cardinality", type=int, default=None,
+                        help="distinct labels per categorical column (default: the built-in label lists)")
+    parser.add_argument("--null-rate", type=float, default=0.02)
+    parser.add_argument("--whitespace-rate", type=float, default=0.05,
+                        help="share of categorical cells padded with stray whitespace")
+    parser.add_argument("--date-formats", default=",".join(DEFAULT_DATE_FORMATS),
+                        help="comma-separated strftime formats, cycled across date columns")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def generator_kwargs(args) -> dict:
+    return {
+        "columns": args.columns,
+        "cardinality": args.cardinality,
+        "null_rate": args.null_rate,
+        "whitespace_rate": args.whitespace_rate,
+        "date_formats": tuple(args.date_formats.split(",")),
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--out", required=True, help="output path; .csv or .xlsx")
+    add_generator_args(parser)
+    args = parser.parse_args()
+
+    df = generate_hr_dataset(args.rows, **generator_kwargs(args))
+    write_dataset(df, args.out)
+    print(f"Wrote {len(df):,} rows x {df.shape[1]} columns to {args.out} "
+          f"({os.path.getsize(args.out) / 1024 ** 2:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregation import GroupedSums
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    rows = 5_000
+    department = rng.choice(["Sales", "HR", "IT", None], rows)
+    return pd.DataFrame({
+        "Department": department,
+        "Location": pd.Categorical(rng.choice(["North", "South"], rows)),
+        "Salary": np.where(rng.random(rows) < 0.1, np.nan, rng.normal(50_000, 10_000, rows)),
+        "Bonus": rng.integers(0, 1_000, rows),
+    })
+
+
+@pytest.mark.parametrize("group_cols", [["Department"], ["Location"], ["Department", "Location"]])
+def test_grouped_sums_match_groupby(frame, group_cols):
+    sums = GroupedSums(frame, group_cols, ["Salary", "Bonus"])
+    # Missing group values are left out, missing values count as zero
+    expected = frame.groupby(group_cols, observed=True)[["Salary", "Bonus"]].sum()
+    counts = frame.groupby(group_cols, observed=True).size()
+
+    table = sums.table.sort_index()
+    expected = expected.sort_index()
+    np.testing.assert_allclose(table["Salary"], expected["Salary"])
+    np.testing.assert_array_equal(table["Bonus"], expected["Bonus"])
+    assert table["Bonus"].dtype == np.int64
+    assert sums.counts.sort_index().tolist() == counts.sort_index().tolist()
+
+
+def test_lookup_and_frame(frame):
+    sums = GroupedSums(frame, "Department", ["Bonus"])
+    hr = frame[frame["Department"] == "HR"]
+    assert sums.lookup("HR")["Bonus"] == hr["Bonus"].sum()
+    assert sorted(sums.groups) == ["HR", "IT", "Sales"]
+    assert list(sums.frame().columns) == ["Department", "Bonus"]
+
+
+def test_from_aggregates_matches_in_memory(frame):
+    in_memory = GroupedSums(frame, ["Department"], ["Bonus"])
+    aggregated = in_memory.table.reset_index().assign(Count=in_memory.counts.to_numpy())
+    rebuilt = GroupedSums.from_aggregates(aggregated, "Department", ["Bonus"])
+    pd.testing.assert_frame_equal(rebuilt.frame(), in_memory.frame())
+    pd.testing.assert_series_equal(rebuilt.counts, in_memory.counts)
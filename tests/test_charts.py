@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.charts import linear_trend
+
+
+def test_linear_trend_matches_polyfit():
+    rng = np.random.default_rng(0)
+    x = rng.normal(40, 10, 5_000)
+    y = 1_200 * x + rng.normal(0, 5_000, 5_000)
+    fit = linear_trend(pd.DataFrame({"Age": x, "Salary": y}), "Age", "Salary")
+
+    slope, intercept = np.polyfit(x, y, 1)
+    assert fit.slope == pytest.approx(slope)
+    assert fit.intercept == pytest.approx(intercept)
+    assert fit.r2 == pytest.approx(np.corrcoef(x, y)[0, 1] ** 2)
+    assert (fit.x_min, fit.x_max) == (x.min(), x.max())
+
+
+def test_linear_trend_skips_missing_rows():
+    df = pd.DataFrame({
+        "Age": pd.array([20, 30, None, 40, 50, 60], dtype="Int64"),
+        "Salary": [1.0, 3.5, 100.0, np.nan, 9.0, 10.0],
+    })
+    fit = linear_trend(df, "Age", "Salary")
+
+    slope, intercept = np.polyfit([20, 30, 50, 60], [1.0, 3.5, 9.0, 10.0], 1)
+    assert fit.slope == pytest.approx(slope)
+    assert fit.intercept == pytest.approx(intercept)
+    assert (fit.x_min, fit.x_max) == (20, 60)
+
+
+def test_linear_trend_needs_spread_in_x():
+    assert linear_trend(pd.DataFrame({"x": [3.0, 3.0, 3.0], "y": [1.0, 2.0, 3.0]}), "x", "y") is None
+    assert linear_trend(pd.DataFrame({"x": [1.0, np.nan], "y": [1.0, 2.0]}), "x", "y") is None
+    assert linear_trend(pd.DataFrame({"x": ["a", "b"], "y": [1.0, 2.0]}), "x", "y") is None
@@ -0,0 +1,52 @@
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from utils.column_detection import detect_column_types
+from utils.data_cleaning import clean_data, sanitize_df_for_streamlit
+
+
+def text_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "amount": [str(i * 1.5) for i in range(200)],
+        "joined": pd.date_range("2020-01-01", periods=200).strftime("%Y-%m-%d"),
+        "team": ["a", "b", "c", "d"] * 50,
+    })
+
+
+def test_detect_coerces_text_columns():
+    df = text_frame()
+    types = detect_column_types(df, coerce=True)
+    assert "amount" in types["numerical"] and "joined" in types["datetime"]
+    assert is_numeric_dtype(df["amount"]) and is_datetime64_any_dtype(df["joined"])
+
+
+def test_cached_key_still_coerces_a_fresh_frame():
+    # A re-ingest under the same key must come back converted, not just labelled
+    detect_column_types(text_frame(), dataset_key="same-key", coerce=True)
+    again = text_frame()
+    types = detect_column_types(again, dataset_key="same-key", coerce=True)
+    assert "amount" in types["numerical"] and "joined" in types["datetime"]
+    assert is_numeric_dtype(again["amount"]) and is_datetime64_any_dtype(again["joined"])
+    assert again["joined"].dt.year.iloc[0] == 2020
+
+
+def test_interned_numbers_with_blanks_are_coerced():
+    # Numbers stored as text with empty cells, as .xlsx sheets often have them
+    df = pd.DataFrame({"Level": ["1", "2", None, "3"] * 50,
+                       "Hired": ["2020-01-05", None, "2021-03-01", "2020-07-19"] * 50})
+    df = sanitize_df_for_streamlit(clean_data(df, drop_duplicates=False))
+    assert isinstance(df["Level"].dtype, pd.CategoricalDtype)
+
+    types = detect_column_types(df, coerce=True)
+    assert "Level" in types["numerical"] and "Hired" in types["datetime"]
+    assert df["Level"].isna().sum() == 50 and df["Level"].sum() == 300
+    assert df["Hired"].isna().sum() == 50 and df["Hired"].iloc[0] == pd.Timestamp("2020-01-05")
+
+
+def test_month_names_are_not_dates():
+    # pandas parses "January" as 0001-01-01 when no format is given
+    months = ["January", "February", "March", "April", "May", "June"] * 40
+    df = pd.DataFrame({"Month": months, "Hired": ["05/01/2020", "17/03/2021", "28/02/2019"] * 80})
+    types = detect_column_types(df, coerce=True)
+    assert "Month" in types["categorical"] and "Hired" in types["datetime"]
+    assert df["Month"].tolist() == months
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.charts import histogram_figure
+from utils.compute import PandasBackend
+
+pytest.importorskip("duckdb")
+from utils.compute import DuckDBBackend  # noqa: E402
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    salary = rng.normal(50_000, 10_000, rows)
+    salary[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "Salary": salary,
+        "Age": rng.integers(20, 65, rows),
+        "Department": rng.choice(["Sales", "HR", "IT", "Ops"], rows, p=[0.4, 0.3, 0.2, 0.1]),
+        "Employee ID": [f"E{i:06d}" for i in range(rows)],
+        "Start Date": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3_000, rows), unit="D"),
+    })
+
+
+@pytest.fixture
+def backends(frame, tmp_path):
+    path = str(tmp_path / "data.parquet")
+    frame.to_parquet(path, index=False)
+    return PandasBackend(frame), DuckDBBackend(path)
+
+
+def test_duckdb_profile_matches_pandas(frame, backends):
+    pandas_backend, duckdb_backend = backends
+    expected = pandas_backend.profile(skip_top=["Employee ID"])
+    actual = duckdb_backend.profile(skip_top=["Employee ID"])
+
+    assert actual.rows == expected.rows
+    for col, want in expected.columns.items():
+        got = actual.columns[col]
+        assert got.kind == want.kind
+        assert got.missing_pct == want.missing_pct
+        # DuckDB's approx_count_distinct keeps fewer registers than our sketch
+        assert got.distinct == pytest.approx(frame[col].nunique(), rel=0.15)
+        assert got.minimum == want.minimum and got.maximum == want.maximum
+        if want.kind == "numeric":
+            assert got.mean == pytest.approx(want.mean)
+            assert got.variance == pytest.approx(want.variance)
+            np.testing.assert_allclose(got.hist_edges, want.hist_edges)
+            np.testing.assert_array_equal(got.hist_counts, want.hist_counts)
+        assert got.top_values(4).to_dict() == want.top_values(4).to_dict()
+
+
+def test_aggregated_profile_cannot_be_merged(backends):
+    _, duckdb_backend = backends
+    column = duckdb_backend.profile().columns["Salary"]
+    with pytest.raises(ValueError):
+        column.merge(column)
+
+
+@pytest.mark.parametrize("x", ["Department", "Age"])
+def test_histogram_coloured_by_its_own_column(frame, backends, x):
+    expected = None
+    for backend in backends:
+        fig, reduction = histogram_figure(frame, x, color=x, backend=backend)
+        counts = sorted(int(count) for trace in fig.data for count in trace.y)
+        assert sum(counts) == frame[x].notna().sum()
+        assert len(counts) <= 20  # one bar per bin or label, not one per (bin, colour)
+        expected = counts if expected is None else expected
+        assert counts == expected
@@ -0,0 +1,41 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.csv_ingest import read_csv_streaming
+from utils.data_cleaning import CATEGORY_MAX_DISTINCT, clean_data, sanitize_df_for_streamlit
+
+
+def employee_csv(rows: int = 5_000, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Department ": rng.choice(["Sales", " HR", "IT ", None], rows),
+        "Name": [f"employee {i}" if i % 17 else None for i in range(rows)],
+        "Salary": np.round(rng.normal(50_000, 10_000, rows), 2),
+        "Start Date": pd.date_range("2020-01-01", periods=rows, freq="h").strftime("%Y-%m-%d"),
+    })
+    # A few exact repeats for the duplicate pass
+    return pd.concat([df, df.iloc[:25]]).to_csv(index=False).encode()
+
+
+def test_streamed_csv_matches_full_read():
+    data = employee_csv()
+    streamed = read_csv_streaming(io.BytesIO(data), chunk_rows=700, sample_rows=500)
+    full = sanitize_df_for_streamlit(clean_data(pd.read_csv(io.BytesIO(data)), copy=False), copy=False)
+
+    pd.testing.assert_frame_equal(streamed.reset_index(drop=True), full.reset_index(drop=True))
+    # Missing departments stay missing rather than becoming a "" category
+    assert list(streamed["Department"].cat.categories.sort_values()) == ["HR", "IT", "Sales"]
+    assert streamed["Department"].isna().any()
+
+
+def test_only_low_cardinality_text_is_interned():
+    rows = 1_000
+    df = pd.DataFrame({
+        "few": [f"label {i % CATEGORY_MAX_DISTINCT}" for i in range(rows)],
+        "many": [f"label {i % (CATEGORY_MAX_DISTINCT + 1)}" for i in range(rows)],
+    })
+    cleaned = clean_data(df)
+    assert isinstance(cleaned["few"].dtype, pd.CategoricalDtype)
+    assert not isinstance(cleaned["many"].dtype, pd.CategoricalDtype)
@@ -0,0 +1,46 @@
+import os
+import time
+
+import pandas as pd
+
+from utils.dataset_store import DatasetStore, default_store_dir, describe_options
+
+OPTIONS = {"strip_whitespace": True, "parse_dates": False, "drop_duplicates": True}
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({"Salary": [1.0, 2.0, 3.0], "Department": ["a", "b", "a"]})
+
+
+def test_store_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("DATA_INSIGHTS_STORE_DIR", raising=False)
+    assert default_store_dir() is None
+    monkeypatch.setenv("DATA_INSIGHTS_STORE_DIR", str(tmp_path))
+    assert default_store_dir() == str(tmp_path)
+
+
+def test_saved_dataset_round_trips_with_its_options(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.save("key", frame(), {"numerical": ["Salary"]}, name="data.csv", options=OPTIONS)
+
+    df, column_types = store.open("key")
+    pd.testing.assert_frame_equal(df, frame())
+    assert column_types == {"numerical": ["Salary"]}
+    assert describe_options(store.list()[0]["options"]) == "trimmed, deduplicated"
+    assert describe_options({key: False for key in OPTIONS}) == "not cleaned"
+
+
+def test_prune_drops_expired_and_least_recently_opened(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    for key in ("old", "unused", "opened"):
+        store.save(key, frame(), {}, name=f"{key}.csv", options=OPTIONS)
+    now = time.time()
+    for key, age in (("old", 7_200), ("unused", 60), ("opened", 120)):
+        manifest_path = os.path.join(tmp_path, key + ".json")
+        os.utime(manifest_path, (now - age, now - age))
+    store.open("opened")
+
+    store.max_age_seconds = 3_600
+    store.max_bytes = store.list()[0]["size_bytes"]
+    store.prune()
+    assert [store.has(key) for key in ("old", "unused", "opened")] == [False, False, True]
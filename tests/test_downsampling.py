@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from utils.downsampling import histogram_frame, lttb_indices, reduce_lines, reduce_scatter, stratified_sample
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4_321] = 50.0
+    kept = lttb_indices(x, y, 200)
+
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert 4_321 in kept
+
+
+def test_lttb_returns_everything_when_small():
+    x = np.arange(50, dtype=np.float64)
+    np.testing.assert_array_equal(lttb_indices(x, x, 100), np.arange(50))
+
+
+def test_reduce_lines_per_colour_group():
+    rows = 20_000
+    df = pd.DataFrame({
+        "day": pd.date_range("2020-01-01", periods=rows, freq="h"),
+        "value": np.random.default_rng(0).normal(size=rows).cumsum(),
+        "team": np.resize(["a", "b"], rows),
+    })
+    reduced, reduction = reduce_lines(df, "day", "value", color="team", max_points=1_000)
+
+    assert reduction.reduced and reduction.rows_out == len(reduced) <= 1_000
+    assert set(reduced["team"]) == {"a", "b"}
+    for _, group in reduced.groupby("team"):
+        assert group["day"].is_monotonic_increasing
+
+
+def test_histogram_frame_matches_numpy():
+    values = np.random.default_rng(1).normal(size=10_000)
+    binned, width, reduction = histogram_frame(pd.DataFrame({"x": values}), "x", nbins=25)
+    counts, edges = np.histogram(values, bins=25)
+    np.testing.assert_array_equal(binned["count"], counts)
+    assert width == edges[1] - edges[0]
+    assert reduction.rows_out == 25
+
+
+def test_stratified_sample_keeps_every_group():
+    df = pd.DataFrame({"x": np.arange(20_000), "group": ["rare"] + ["common"] * 19_999})
+    sample = stratified_sample(df, "group", max_points=1_000)
+    assert "rare" in set(sample["group"])
+    assert len(sample) <= 1_001
+
+
+def test_large_numeric_scatter_becomes_a_density_grid():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"x": rng.normal(size=2_000), "y": rng.normal(size=2_000)})
+    method, (xs, ys, counts), reduction = reduce_scatter(df, "x", "y", max_points=500, density_min_rows=1_000)
+    assert method == "density"
+    assert counts.sum() == len(df)
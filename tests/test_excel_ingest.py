@@ -0,0 +1,45 @@
+import gc
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from utils.excel_ingest import WorkbookIngest
+
+pytest.importorskip("openpyxl")
+
+
+@pytest.fixture(scope="module")
+def workbook_bytes():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"a": [1, 2, 3]}).to_excel(writer, sheet_name="First", index=False)
+        pd.DataFrame({"b": ["x", "y"]}).to_excel(writer, sheet_name="Second", index=False)
+    return buffer.getvalue()
+
+
+def test_parsed_sheet_is_handed_out_once(workbook_bytes):
+    with ThreadPoolExecutor(1) as pool:
+        workbook = WorkbookIngest(workbook_bytes, "hash", pool=pool, engine="openpyxl")
+        assert workbook.sheet_names == ["First", "Second"]
+        assert workbook.read("Second")["b"].tolist() == ["x", "y"]
+        assert "Second" not in workbook._futures
+        # Read again from the file once the background result is gone
+        assert workbook.read("Second")["b"].tolist() == ["x", "y"]
+        workbook.close()
+
+
+def test_close_and_collection_remove_the_temp_file(workbook_bytes):
+    closed = WorkbookIngest(workbook_bytes, "hash", engine="openpyxl")
+    dropped = WorkbookIngest(workbook_bytes, "hash", engine="openpyxl")
+    assert closed.path != dropped.path
+
+    closed.close()
+    assert not os.path.exists(closed.path)
+
+    path = dropped.path
+    del dropped
+    gc.collect()
+    assert not os.path.exists(path)
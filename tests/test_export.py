@@ -0,0 +1,84 @@
+import gzip
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.export import ExportStore, available_formats, static_url_prefix
+
+
+@pytest.fixture
+def frame():
+    rows = 2_500
+    return pd.DataFrame({
+        "Name": [f"employee {i}" for i in range(rows)],
+        "Department": pd.Categorical(np.resize(["Sales", "HR", "IT"], rows)),
+        "Salary": np.linspace(30_000, 90_000, rows),
+        "Active": np.resize([True, False], rows),
+        "Start Date": pd.date_range("2020-01-01", periods=rows, freq="D"),
+    })
+
+
+def chunks(df, rows: int = 1_000):
+    return (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+
+
+def read_back(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    if fmt == "xlsx":
+        return pd.read_excel(path)
+    if fmt == "csv.zst":
+        import zstandard
+        with open(path, "rb") as f:
+            return pd.read_csv(io.BytesIO(zstandard.ZstdDecompressor().stream_reader(f).read()))
+    if fmt == "csv.gz":
+        with gzip.open(path) as f:
+            return pd.read_csv(f)
+    return pd.read_csv(path)
+
+
+@pytest.mark.parametrize("fmt", available_formats())
+def test_chunked_export_round_trips(frame, tmp_path, fmt):
+    store = ExportStore(str(tmp_path))
+    path = store.export("key", fmt, chunks(frame))
+    back = read_back(path, fmt)
+
+    assert list(back.columns) == list(frame.columns)
+    assert len(back) == len(frame)
+    np.testing.assert_allclose(back["Salary"], frame["Salary"])
+    assert back["Department"].astype(str).tolist() == frame["Department"].astype(str).tolist()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_finished_export_is_reused(frame, tmp_path):
+    store = ExportStore(str(tmp_path))
+    store.export("key", "csv", chunks(frame))
+    # A second request doesn't consume its chunks at all
+    store.export("key", "csv", iter(lambda: pytest.fail("re-exported"), None))
+    assert store.has("key", "csv")
+
+
+def test_prune_drops_expired_and_least_recently_used(frame, tmp_path):
+    store = ExportStore(str(tmp_path))
+    for key in ("old", "stale", "fresh"):
+        store.export(key, "csv", chunks(frame))
+    size = store.size("fresh", "csv")
+    now = time.time()
+    os.utime(store.path("old", "csv"), (now - 7_200, now - 7_200))
+    os.utime(store.path("stale", "csv"), (now - 60, now - 60))
+
+    store.max_age_seconds = 3_600
+    store.max_bytes = size
+    store.prune(now=now)
+    assert [store.has(key, "csv") for key in ("old", "stale", "fresh")] == [False, False, True]
+
+
+def test_static_urls_only_inside_the_static_dir(tmp_path):
+    from utils.export import APP_STATIC_DIR
+
+    assert static_url_prefix(os.path.join(APP_STATIC_DIR, "exports")) == "app/static/exports"
+    assert static_url_prefix(str(tmp_path)) is None
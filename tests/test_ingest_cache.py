@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils.ingest_cache import IngestCache, frame_nbytes
+
+
+def frame(value: int, rows: int = 1_000) -> pd.DataFrame:
+    return pd.DataFrame({"value": [value] * rows})
+
+
+def spill_files(root) -> list:
+    return sorted(os.listdir(root))
+
+
+def test_concurrent_loads_run_the_loader_once():
+    cache = IngestCache(max_bytes=10 ** 9)
+    calls = []
+    started = threading.Barrier(4)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return frame(1), {"value": "numerical"}
+
+    def load():
+        started.wait()
+        cache.get_or_load("key", loader)
+
+    threads = [threading.Thread(target=load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.stats["coalesced_loads"] == 3
+    assert cache._loading == {}
+
+
+def test_views_do_not_leak_writes():
+    cache = IngestCache(max_bytes=10 ** 9)
+    cache.put("key", frame(1), {})
+    view, _ = cache.get("key")
+    view.loc[0, "value"] = 99
+    assert cache.get("key")[0].loc[0, "value"] == 1
+
+
+def test_evicted_entry_is_promoted_and_its_spill_removed(tmp_path):
+    budget = frame_nbytes(frame(0)) * 2
+    cache = IngestCache(max_bytes=budget, spill_dir=str(tmp_path))
+    for key in "abc":
+        cache.put(key, frame(ord(key)), {"value": "numerical"})
+
+    assert "a" not in cache._entries
+    assert spill_files(tmp_path) == ["a.json", "a.parquet"]
+
+    df, column_types = cache.get("a")
+    assert df["value"].iloc[0] == ord("a") and column_types == {"value": "numerical"}
+    assert cache.stats["spill_hits"] == 1
+    # "a" is back in memory and "b" made room for it
+    assert spill_files(tmp_path) == ["b.json", "b.parquet"]
+
+
+def test_pinned_entries_are_not_evicted(tmp_path):
+    cache = IngestCache(max_bytes=frame_nbytes(frame(0)), spill_dir=str(tmp_path))
+    cache.put("a", frame(1), {})
+    cache.acquire("a", "session")
+    cache.acquire("a", "other")
+    cache.acquire("a", "other")
+    assert cache.refcount("a") == 2
+    cache.put("b", frame(2), {})
+    assert "a" in cache._entries and "b" in cache._entries
+
+    cache.release("a", "session")
+    cache.release("a", "other")
+    assert cache.refcount("a") == 0
+    cache.put("c", frame(3), {})
+    assert "a" not in cache._entries
+
+
+@pytest.mark.parametrize("spilled", [False, True])
+def test_idle_eviction_removes_spill_files(tmp_path, spilled):
+    budget = frame_nbytes(frame(0)) * (1 if spilled else 4)
+    cache = IngestCache(max_bytes=budget, spill_dir=str(tmp_path), idle_seconds=60)
+    cache.put("a", frame(1), {})
+    cache.put("b", frame(2), {})
+    assert bool(spill_files(tmp_path)) == spilled
+
+    cache.evict_idle(now=time.monotonic() + 120)
+    assert cache._entries == {} and spill_files(tmp_path) == []
+    assert cache.get("a") is None
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.profiling import (
+    ColumnProfile, DatasetProfile, HyperLogLog, SpaceSaving, numeric_ranges, profile_dataframe
+)
+
+
+def drifting_frame(rows: int = 12_000, seed: int = 0) -> pd.DataFrame:
+    # Values drift upwards row by row, so every chunk covers a different range
+    rng = np.random.default_rng(seed)
+    drift = np.linspace(0, 100, rows)
+    values = drift + rng.normal(0, 5, rows)
+    values[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({"value": values, "label": rng.choice(list("abcdef"), rows)})
+
+
+def test_chunked_histogram_matches_numpy():
+    df = drifting_frame()
+    profile = profile_dataframe(df, chunk_rows=1_000)
+    column = profile.columns["value"]
+
+    values = df["value"].dropna().to_numpy()
+    counts, edges = np.histogram(values, bins=column.bins)
+    np.testing.assert_allclose(column.hist_edges, edges)
+    np.testing.assert_array_equal(column.hist_counts, counts)
+
+
+def test_chunked_moments_match_numpy():
+    df = drifting_frame()
+    column = profile_dataframe(df, chunk_rows=1_000).columns["value"]
+    values = df["value"].dropna().to_numpy()
+    assert column.count == len(values)
+    assert column.mean == pytest.approx(values.mean())
+    assert column.variance == pytest.approx(values.var(ddof=1))
+    assert column.minimum == values.min() and column.maximum == values.max()
+    assert column.missing_pct == pytest.approx(df["value"].isna().mean() * 100, abs=0.01)
+
+
+def test_merged_profiles_match_single_pass():
+    df = drifting_frame()
+    ranges = numeric_ranges(df)
+    left, right = DatasetProfile(ranges=ranges), DatasetProfile(ranges=ranges)
+    left.update(df.iloc[:5_000])
+    right.update(df.iloc[5_000:])
+    left.merge(right)
+
+    whole = profile_dataframe(df)
+    merged, single = left.columns["value"], whole.columns["value"]
+    np.testing.assert_array_equal(merged.hist_counts, single.hist_counts)
+    assert merged.variance == pytest.approx(single.variance)
+    assert merged.top_values(6).to_dict() == single.top_values(6).to_dict()
+
+
+def test_merge_refuses_different_edges():
+    a, b = ColumnProfile("x", np.dtype("float64")), ColumnProfile("x", np.dtype("float64"))
+    a.update(pd.Series([0.0, 1.0]))
+    b.update(pd.Series([5.0, 9.0]))
+    with pytest.raises(ValueError):
+        a.merge(b)
+
+
+def test_values_outside_shared_range_are_rejected():
+    column = ColumnProfile("x", np.dtype("float64"), hist_range=(0.0, 1.0))
+    with pytest.raises(ValueError):
+        column.update(pd.Series([0.5, 2.0]))
+
+
+@pytest.mark.parametrize("distinct", [10, 1_000, 100_000])
+def test_hyperloglog_estimate(distinct):
+    hll = HyperLogLog()
+    values = pd.Series(np.arange(distinct)).repeat(3)
+    hll.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+    # Standard error at precision 12 is about 1.6%
+    assert hll.estimate() == pytest.approx(distinct, rel=0.05)
+
+
+def test_hyperloglog_merge_equals_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a = pd.util.hash_pandas_object(pd.Series(np.arange(0, 6_000)), index=False).to_numpy()
+    b = pd.util.hash_pandas_object(pd.Series(np.arange(4_000, 10_000)), index=False).to_numpy()
+    left.add_hashes(a)
+    right.add_hashes(b)
+    union.add_hashes(np.concatenate([a, b]))
+    left.merge(right)
+    np.testing.assert_array_equal(left.registers, union.registers)
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = np.random.default_rng(1)
+    heavy = np.repeat(["h1", "h2", "h3"], [5_000, 3_000, 2_000])
+    noise = rng.integers(0, 20_000, 10_000).astype(str)
+    values = pd.Series(np.concatenate([heavy, noise]))
+    values = values.sample(frac=1, random_state=0).reset_index(drop=True)
+
+    sketch = SpaceSaving(capacity=16)
+    for start in range(0, len(values), 1_000):
+        sketch.add_counts(values.iloc[start:start + 1_000].value_counts())
+
+    truth = values.value_counts()
+    assert list(sketch.top(3).index) == ["h1", "h2", "h3"]
+    for value, count in sketch.top(3).items():
+        # Over-estimated by at most the floor, never under-estimated
+        assert truth[value] <= count <= truth[value] + sketch.floor
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.compute import PandasBackend
+from utils.timeseries import build_rollups
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    rows = 10_000
+    salary = rng.normal(50_000, 10_000, rows)
+    salary[rng.random(rows) < 0.05] = np.nan
+    # Sundays and month ends exercise the period boundaries
+    days = pd.Timestamp("2019-12-29") + pd.to_timedelta(rng.integers(0, 1_500, rows), unit="D")
+    return pd.DataFrame({
+        "Start Date": days,
+        "Salary": salary,
+        "Bonus": rng.integers(0, 1_000, rows),
+    })
+
+
+@pytest.mark.parametrize("freq, period", [("D", "D"), ("W", "W-SUN"), ("M", "M"), ("Q", "Q")])
+def test_rollups_match_groupby(frame, freq, period):
+    rollups = build_rollups(PandasBackend(frame), "Start Date", ["Salary", "Bonus"])
+    # Weeks run Monday to Sunday and are labelled by their Monday
+    keys = frame["Start Date"].dt.to_period(period).dt.start_time
+    expected = frame.groupby(keys)[["Salary", "Bonus"]].sum()
+
+    actual = rollups.frames[freq]
+    np.testing.assert_array_equal(actual.index, expected.index)
+    np.testing.assert_allclose(actual["Salary"], expected["Salary"])
+    np.testing.assert_array_equal(actual["Bonus"], expected["Bonus"])
+    assert rollups.rows_in == len(frame)
+
+
+def test_auto_granularity_fits_the_chart_width(frame):
+    rollups = build_rollups(PandasBackend(frame), "Start Date", ["Salary"])
+    # About 1,500 days, 215 weeks, 50 months and 17 quarters
+    assert rollups.auto_granularity(width_px=8_000) == "D"
+    assert rollups.auto_granularity(width_px=1_200) == "W"
+    assert rollups.auto_granularity(width_px=400) == "M"
+    assert rollups.auto_granularity(width_px=40) == "Q"
+
+    data, freq, reduction = rollups.frame("Salary", width_px=400)
+    assert freq == "M"
+    assert list(data.columns) == ["Start Date", "Salary"]
+    assert reduction.rows_in == len(frame) and reduction.rows_out == len(data)
+
+
+@pytest.mark.parametrize("freq", [None, "D", "W", "M", "Q"])
+def test_duckdb_resample_sum_matches_pandas(frame, tmp_path, freq):
+    pytest.importorskip("duckdb")
+    from utils.compute import DuckDBBackend
+
+    path = str(tmp_path / "data.parquet")
+    frame.to_parquet(path, index=False)
+    expected = PandasBackend(frame).resample_sum("Start Date", ["Salary", "Bonus"], freq)
+    actual = DuckDBBackend(path).resample_sum("Start Date", ["Salary", "Bonus"], freq)
+
+    np.testing.assert_array_equal(actual["Start Date"].to_numpy("datetime64[ns]"),
+                                  expected["Start Date"].to_numpy("datetime64[ns]"))
+    np.testing.assert_allclose(actual["Salary"], expected["Salary"])
+    np.testing.assert_array_equal(actual["Bonus"], expected["Bonus"])
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+
+def group_codes(series: pd.Series):
+    # Categorical columns already carry integer codes; everything else is factorized once
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series, sort=False)
+
+
+class GroupedSums:
+    """Per-group sums and row counts for a set of numeric columns.
+
+    Built with one ``np.bincount`` per value column over the group codes, so
+    filtering to a single group afterwards is a row lookup rather than a scan.
+    """
+
+    def __init__(self, df: pd.DataFrame, group_cols, value_cols):
+        group_cols = [group_cols] if isinstance(group_cols, str) else list(group_cols)
+        self.group_cols = group_cols
+        self.value_cols = list(value_cols)
+
+        codes = np.zeros(len(df), dtype=np.int64)
+        valid = np.ones(len(df), dtype=bool)
+        levels = []
+        for col in group_cols:
+            col_codes, uniques = group_codes(df[col])
+            valid &= col_codes >= 0
+            codes = codes * len(uniques) + col_codes
+            levels.append(uniques)
+
+        # Compact the combined codes to the groups that actually occur
+        observed, compact = np.unique(codes[valid], return_inverse=True)
+        counts = np.bincount(compact, minlength=len(observed))
+        sums = {}
+        for col in self.value_cols:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+            sums[col] = np.bincount(compact, weights=np.nan_to_num(values), minlength=len(observed))
+            if pd.api.types.is_integer_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+                sums[col] = sums[col].astype(np.int64)
+
+        # Decode the combined codes back into one index level per group column
+        arrays = []
+        for uniques in reversed(levels):
+            arrays.append(np.asarray(uniques)[observed % len(uniques)])
+            observed = observed // len(uniques)
+        index = pd.MultiIndex.from_arrays(arrays[::-1], names=group_cols) if len(group_cols) > 1 \
+            else pd.Index(arrays[0], name=group_cols[0])
+
+        self.table = pd.DataFrame(sums, index=index)
+        self.counts = pd.Series(counts, index=index, name="Count")
+
+    @classmethod
+    def from_aggregates(cls, frame: pd.DataFrame, group_cols, value_cols):
+        # Rows already aggregated elsewhere (e.g. by an out-of-core engine): group columns,
+        # one sum per value column and a "Count" column
+        sums = cls.__new__(cls)
+        sums.group_cols = [group_cols] if isinstance(group_cols, str) else list(group_cols)
+        sums.value_cols = list(value_cols)
+        indexed = frame.set_index(sums.group_cols)
+        sums.table = indexed[sums.value_cols]
+        sums.counts = indexed["Count"].rename("Count")
+        return sums
+
+    @property
+    def groups(self) -> list:
+        return self.table.index.tolist()
+
+    def lookup(self, value) -> pd.Series:
+        return self.table.loc[value]
+
+    def frame(self, value_cols=None) -> pd.DataFrame:
+        cols = self.value_cols if value_cols is None else list(value_cols)
+        return self.table[cols].reset_index()
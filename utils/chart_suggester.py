@@ -1,4 +1,12 @@
-from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype as is_datetime
+import pandas as pd
+from pandas.api.types import (
+    is_numeric_dtype, is_object_dtype, is_string_dtype,
+    is_datetime64_any_dtype as is_datetime
+)
+
+def _is_label_column(series):
+    return (is_object_dtype(series) or is_string_dtype(series)
+            or isinstance(series.dtype, pd.CategoricalDtype))
 
 def suggest_chart_type(df, x_col, y_col=None):
     if isinstance(y_col, list):
@@ -8,7 +16,7 @@ def suggest_chart_type(df, x_col, y_col=None):
             y_col = y_col[0]
 
     if y_col is None or y_col not in df.columns:
-        if df[x_col].dtype == "object" or df[x_col].nunique() < 20:
+        if _is_label_column(df[x_col]) or df[x_col].nunique() < 20:
             return "Bar"
         elif is_numeric_dtype(df[x_col]):
             return "Histogram"
@@ -19,7 +27,7 @@ def suggest_chart_type(df, x_col, y_col=None):
         return "Line"
     elif is_numeric_dtype(df[x_col]) and is_numeric_dtype(df[y_col]):
         return "Scatter"
-    elif df[x_col].dtype == "object" and is_numeric_dtype(df[y_col]):
+    elif _is_label_column(df[x_col]) and is_numeric_dtype(df[y_col]):
         return "Bar"
     else:
         return "Bar"
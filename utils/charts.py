@@ -1,50 +1,237 @@
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from utils.downsampling import histogram_frame
+from utils.instrumentation import instrument, plotly_chart, stage
+from utils.profiling import profile_dataframe
+from utils.timeseries import get_rollups, granularity_label
+from utils.workers import fill_as_completed, placeholder
 
-def generate_overview_charts(df, column_types):
-    # --- Categorical columns ---
-    for cat_col in column_types["categorical"]:
-        st.markdown(f"#### 📊 Top Categories in `{cat_col}`")
-        top_values = df[cat_col].value_counts().head(10).reset_index()
-        top_values.columns = [cat_col, "Count"]
-        fig = px.bar(top_values, x=cat_col, y="Count", color=cat_col,
-                    color_discrete_sequence=px.colors.qualitative.Pastel,
-                    labels={cat_col: cat_col, "Count": "Frequency"},
-                    title=f"Top 10 Values in {cat_col}")
-        fig.update_layout(margin=dict(t=50, b=40), height=400)
-        st.plotly_chart(fig, use_container_width=True)
-
-    # --- Numerical columns ---
-    colors = px.colors.qualitative.Set3
-    for idx, num_col in enumerate(column_types["numerical"]):
-        st.markdown(f"#### 📈 Distribution of `{num_col}`")
-
-        color = colors[idx % len(colors)]
-
-        fig = px.histogram(df, x=num_col, nbins=20,
-                        color_discrete_sequence=[color],
-                        labels={num_col: num_col},
-                        title=f"Distribution of {num_col}")
-        fig.update_layout(margin=dict(t=50, b=40), height=400)
-        st.plotly_chart(fig, use_container_width=True, key=f"num_{num_col}")
-
-    # --- Time Series (if any datetime + one numerical) ---
-    if column_types["datetime"] and column_types["numerical"]:
-        for date_col in column_types["datetime"]:
-            for value_col in column_types["numerical"]:
-                try:
-                    ts = df[[date_col, value_col]].dropna()
-                    ts[date_col] = pd.to_datetime(ts[date_col])
-                    agg = ts.groupby(date_col)[value_col].sum().reset_index()
-
-                    st.markdown(f"#### ⏱️ Time Series: `{value_col}` over `{date_col}`")
-                    fig = px.line(agg, x=date_col, y=value_col,
-                                markers=True,
-                                title=f"{value_col} Over Time ({date_col})",
-                                labels={date_col: "Date", value_col: "Total"})
-                    fig.update_traces(line=dict(color="#E26A6A", width=2))
-                    fig.update_layout(margin=dict(t=50, b=40), height=400)
-                    st.plotly_chart(fig, use_container_width=True)
-                except:
-                    pass
\ No newline at end of file
+def show_reduction(reduction):
+    if reduction is not None and reduction.reduced:
+        st.caption(f"🔻 {reduction.describe()}")
+
+def histogram_figure(df, x, color=None, nbins=20, backend=None, **kwargs):
+    # Bins are counted on the server (in the backend's engine when given), so only bin counts reach the browser.
+    # Colouring by x itself needs no extra grouping: every bar already holds a single x value
+    group = color if color != x else None
+    if backend is not None:
+        binned, width, reduction = backend.histogram(x, group, nbins)
+    else:
+        binned, width, reduction = histogram_frame(df, x, group, nbins)
+    fig = px.bar(binned, x=x, y="count", color=color, **kwargs)
+    if width is not None:
+        fig.update_traces(width=width)
+        fig.update_layout(bargap=0)
+    return fig, reduction
+
+class LinearFit:
+    def __init__(self, y, slope, intercept, r2, x_min, x_max):
+        self.y = y
+        self.slope = slope
+        self.intercept = intercept
+        self.r2 = r2
+        self.x_min = x_min
+        self.x_max = x_max
+
+
+@instrument()
+def linear_trend(df, x, y):
+    # Closed-form simple OLS over all rows in float64; the same line statsmodels would fit
+    if not (is_numeric_dtype(df[x]) and is_numeric_dtype(df[y])):
+        return None
+    xs = df[x].to_numpy(dtype=np.float64, na_value=np.nan)
+    ys = df[y].to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[keep], ys[keep]
+    if len(xs) < 2:
+        return None
+    x_mean, y_mean = xs.mean(), ys.mean()
+    dx, dy = xs - x_mean, ys - y_mean
+    sxx = np.dot(dx, dx)
+    if sxx == 0:
+        return None
+    slope = np.dot(dx, dy) / sxx
+    syy = np.dot(dy, dy)
+    r2 = 1 - (syy - slope * np.dot(dx, dy)) / syy if syy else 1.0
+    return LinearFit(y, float(slope), float(y_mean - slope * x_mean), float(r2), float(xs.min()), float(xs.max()))
+
+def add_trend_trace(fig, fit, color="#E26A6A", group=None):
+    # Drawn as a single two-point line; group names the colour group the fit covers
+    if fit is None:
+        return fig
+    label = fit.y if group is None else f"{fit.y}, {group}"
+    xs = np.array([fit.x_min, fit.x_max])
+    fig.add_trace(go.Scatter(x=xs, y=fit.slope * xs + fit.intercept, mode="lines",
+                             name=f"OLS trend ({label}), R²={fit.r2:.3f}",
+                             line=dict(color=color, width=2)))
+    return fig
+
+def add_linear_trend(fig, df, x, y):
+    return add_trend_trace(fig, linear_trend(df, x, y))
+
+def density_figure(x_centres, y_centres, counts, x, y, title=None):
+    fig = go.Figure(go.Heatmap(x=x_centres, y=y_centres, z=counts,
+                               colorscale="Blues", colorbar=dict(title="Rows")))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+OVERVIEW_PAGE_SIZE = 12
+
+# --- Ranking ---
+def _normalized_entropy(counts):
+    counts = np.asarray(counts, dtype=float)
+    counts = counts[counts > 0]
+    if len(counts) < 2:
+        return 0.0
+    p = counts / counts.sum()
+    return float(-(p * np.log(p)).sum() / np.log(len(counts)))
+
+def overview_chart_score(kind, columns):
+    # Cheap interestingness score in [0, 1] computed from the profile only
+    if kind == "categorical":
+        column = columns[0]
+        if column.distinct < 2:
+            return 0.0
+        score = (1 - column.missing_pct / 100) * (0.3 + 0.7 * _normalized_entropy(column.top_values(10)))
+        # Top-10 of an ID-like column says very little
+        return score * (0.3 if column.distinct > 50 else 1.0)
+
+    value = columns[-1]
+    if value.hist_counts is None or value.distinct < 2:
+        return 0.0
+    spread = min(value.variance ** 0.5 / (abs(value.mean) + 1e-9), 1.0)
+    score = (1 - value.missing_pct / 100) * (0.5 * spread + 0.5 * _normalized_entropy(value.hist_counts))
+    if kind == "timeseries":
+        date = columns[0]
+        if date.distinct < 2:
+            return 0.0
+        score *= 0.9 * (1 - date.missing_pct / 100)
+    return score
+
+def rank_overview_charts(column_types, profile):
+    specs = [("categorical", (col,)) for col in column_types["categorical"]]
+    specs += [("numeric", (col,)) for col in column_types["numerical"]]
+    specs += [("timeseries", (date_col, value_col))
+              for date_col in column_types["datetime"] for value_col in column_types["numerical"]]
+    scored = [(overview_chart_score(kind, [profile.columns[c] for c in cols]), kind, cols)
+              for kind, cols in specs]
+    return sorted(scored, key=lambda item: item[0], reverse=True)
+
+# --- Figure builders ---
+def _categorical_figure(df, profile, cat_col):
+    top_values = profile.columns[cat_col].top_values(10).reset_index()
+    top_values.columns = [cat_col, "Count"]
+    fig = px.bar(top_values, x=cat_col, y="Count", color=cat_col,
+                color_discrete_sequence=px.colors.qualitative.Pastel,
+                labels={cat_col: cat_col, "Count": "Frequency"},
+                title=f"Top 10 Values in {cat_col}")
+    fig.update_layout(margin=dict(t=50, b=40), height=400)
+    return fig, None
+
+def _numeric_figure(df, profile, num_col, color):
+    column = profile.columns[num_col]
+    edges = column.hist_edges
+    bins = pd.DataFrame({num_col: (edges[:-1] + edges[1:]) / 2, "count": column.hist_counts})
+    fig = px.bar(bins, x=num_col, y="count",
+                    color_discrete_sequence=[color],
+                    labels={num_col: num_col},
+                    title=f"Distribution of {num_col}")
+    fig.update_traces(width=edges[1] - edges[0])
+    fig.update_layout(margin=dict(t=50, b=40), height=400, bargap=0)
+    return fig, None
+
+def _timeseries_figure(df, date_col, value_col, numeric_cols, backend=None, granularity="auto", dataset_key=None):
+    # Every chart on the same date column, here and on the Customize page, reads one cached rollup
+    rollups = get_rollups(date_col, numeric_cols, df=df, backend=backend, dataset_key=dataset_key)
+    agg, freq, reduction = rollups.frame(value_col, granularity)
+    fig = px.line(agg, x=date_col, y=value_col,
+                markers=True,
+                title=f"{value_col} per {granularity_label(freq)} ({date_col})",
+                labels={date_col: "Date", value_col: "Total"})
+    fig.update_traces(line=dict(color="#E26A6A", width=2))
+    fig.update_layout(margin=dict(t=50, b=40), height=400)
+    return fig, reduction
+
+def build_overview_figure(kind, cols, df, profile, backend=None, granularity="auto", dataset_key=None, numeric_cols=()):
+    if kind == "categorical":
+        return _categorical_figure(df, profile, cols[0])
+    if kind == "numeric":
+        colors = px.colors.qualitative.Set3
+        color = colors[list(profile.columns).index(cols[0]) % len(colors)]
+        return _numeric_figure(df, profile, cols[0], color)
+    return _timeseries_figure(df, *cols, numeric_cols or [cols[1]], backend=backend, granularity=granularity,
+                              dataset_key=dataset_key)
+
+@st.cache_resource(max_entries=512, show_spinner=False)
+def _cached_overview_figure(dataset_key, kind, cols, granularity, _df, _profile, _backend=None, _numeric_cols=()):
+    return build_overview_figure(kind, cols, _df, _profile, _backend, granularity, dataset_key, _numeric_cols)
+
+_OVERVIEW_HEADINGS = {
+    "categorical": "#### 📊 Top Categories in `{0}`",
+    "numeric": "#### 📈 Distribution of `{0}`",
+    "timeseries": "#### ⏱️ Time Series: `{1}` over `{0}`",
+}
+
+def generate_overview_charts(df, column_types, profile=None, dataset_key=None,
+                             page_size=OVERVIEW_PAGE_SIZE, jobs=None, backend=None, granularity="auto"):
+    # Value counts and histograms come from the single-pass profile instead of rescanning df
+    if profile is None:
+        profile = profile_dataframe(df)
+
+    # Only the highest-ranked charts are built; the rest wait until the user asks for them
+    ranked = rank_overview_charts(column_types, profile)
+    visible_key = f"overview_visible_{dataset_key}"
+    if visible_key not in st.session_state:
+        st.session_state[visible_key] = page_size
+    visible = st.session_state[visible_key]
+
+    numeric_cols = tuple(column_types.get("numerical", []))
+
+    def build(spec):
+        kind, cols = spec
+        with stage(f"overview figure: {kind} {', '.join(cols)}", df) as record:
+            if dataset_key is None:
+                fig, reduction = build_overview_figure(kind, cols, df, profile, backend, granularity,
+                                                       numeric_cols=numeric_cols)
+            else:
+                # Only time series depend on the granularity; other charts keep their cache entry when it changes
+                fig, reduction = _cached_overview_figure(dataset_key, kind, cols,
+                                                         granularity if kind == "timeseries" else "auto",
+                                                         df, profile, backend, numeric_cols)
+            record.output(fig)
+        return fig, reduction
+
+    def render(spec, result):
+        kind, cols = spec
+        fig, reduction = result
+        plotly_chart(fig, use_container_width=True, key=f"overview_{kind}_{'_'.join(cols)}")
+        show_reduction(reduction)
+
+    specs = [(kind, cols) for score, kind, cols in ranked[:visible]]
+    if jobs is None:
+        for spec in specs:
+            st.markdown(_OVERVIEW_HEADINGS[spec[0]].format(*spec[1]))
+            try:
+                result = build(spec)
+            except (ValueError, TypeError, KeyError) as e:
+                st.warning(f"Could not build this chart: {e}")
+                continue
+            render(spec, result)
+    else:
+        # All figures build in the worker pool; each fills its placeholder as it finishes
+        slots = []
+        for spec in specs:
+            st.markdown(_OVERVIEW_HEADINGS[spec[0]].format(*spec[1]))
+            slots.append((placeholder(), jobs.submit(build, spec), spec))
+        fill_as_completed(slots, render)
+
+    remaining = ranked[visible:]
+    if remaining:
+        st.caption(f"Showing {visible} of {len(ranked)} charts, ranked by how informative they look.")
+        if st.button(f"➕ Show {min(page_size, len(remaining))} more charts"):
+            st.session_state[visible_key] = visible + page_size
+            st.rerun()
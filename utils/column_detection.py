@@ -1,8 +1,204 @@
+import re
+import threading
+import warnings
+from collections import OrderedDict
 from difflib import get_close_matches
 
-def detect_column_types(df):
-    return {
-        "categorical": df.select_dtypes(include=["object", "category"]).columns.tolist(),
-        "numerical": df.select_dtypes(include=["int64", "float64"]).columns.tolist(),
-        "datetime": df.select_dtypes(include=["datetime64[ns]"]).columns.tolist()
-    }
\ No newline at end of file
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+)
+
+from utils.data_cleaning import CATEGORY_MAX_DISTINCT, DATE_MIN_PARSED, infer_date_format, is_date_column
+from utils.instrumentation import instrument
+
+INFERENCE_SAMPLE_ROWS = 10_000
+LOW_CARDINALITY_MAX = CATEGORY_MAX_DISTINCT   # distinct values in the sample; same cap as interning
+HIGH_CARDINALITY_RATIO = 0.5    # distinct / non-null in the sample; above this labels stop repeating
+NUMERIC_MIN_PARSED = 0.95
+TEXT_MIN_WORDS = 3
+TEXT_MIN_LENGTH = 40
+LEADING_ZERO_RATIO = 0.1
+DATE_PROBE_ROWS = 200
+INFERENCE_CACHE_SIZE = 64
+
+# List-valued keys of the dict detect_column_types returns. "categorical" holds every
+# label column worth counting; "high_cardinality" is the subset too wide to colour by.
+COLUMN_KINDS = ("categorical", "numerical", "datetime", "high_cardinality", "identifier", "text", "empty")
+
+_ID_NAME = re.compile(r"(^|[^a-z])(id|code|no|number|key|uuid|guid)([^a-z]|$)")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ColumnInference:
+    def __init__(self, name, kind: str, confidence: float, coerce_to: str | None = None, date_format=None):
+        self.name = name
+        self.kind = kind  # numeric, datetime, categorical, high_cardinality, identifier, text, empty
+        self.confidence = round(float(confidence), 3)
+        self.coerce_to = coerce_to
+        self.date_format = date_format
+
+    def as_dict(self) -> dict:
+        return {"kind": self.kind, "confidence": self.confidence}
+
+
+def _margin(value: float, threshold: float, scale: float) -> float:
+    # Confidence in [0.5, 1]: how far the deciding statistic sits from its threshold
+    return 0.5 + 0.5 * min(abs(value - threshold) / scale, 1.0)
+
+
+def _looks_like_id_name(name) -> bool:
+    name = str(name)
+    return bool(_ID_NAME.search(name.lower())) or name.endswith(("ID", "Id"))
+
+
+def sample_rows(df: pd.DataFrame, n: int = INFERENCE_SAMPLE_ROWS, seed: int = 0) -> pd.DataFrame:
+    if len(df) <= n:
+        return df
+    # Generator.choice without replacement is O(n) in the sample size, not the frame
+    idx = np.sort(np.random.default_rng(seed).choice(len(df), size=n, replace=False))
+    return df.take(idx)
+
+
+def _infer_numeric(name, values: pd.Series, total_rows: int) -> ColumnInference:
+    if not pd.api.types.is_integer_dtype(values) or values.empty:
+        return ColumnInference(name, "numeric", 1.0)
+    ratio = values.nunique() / len(values)
+    if _looks_like_id_name(name) and ratio >= HIGH_CARDINALITY_RATIO:
+        return ColumnInference(name, "identifier", 0.95)
+    # Near-unique integers spanning about one value per row: a row counter or surrogate key
+    span = float(values.max()) - float(values.min()) + 1
+    if ratio >= 0.99 and 0.9 <= span / total_rows <= 1.1:
+        return ColumnInference(name, "identifier", 0.8)
+    return ColumnInference(name, "numeric", 1.0)
+
+
+def _infer_labels(name, text: pd.Series) -> ColumnInference:
+    distinct = text.nunique()
+    ratio = distinct / len(text)
+    if distinct <= LOW_CARDINALITY_MAX:
+        return ColumnInference(name, "categorical", _margin(distinct, LOW_CARDINALITY_MAX + 1, LOW_CARDINALITY_MAX))
+    if ratio <= HIGH_CARDINALITY_RATIO:
+        return ColumnInference(name, "high_cardinality", _margin(ratio, HIGH_CARDINALITY_RATIO, HIGH_CARDINALITY_RATIO))
+
+    words = text.str.count(r"\s+").mean() + 1
+    length = text.str.len().mean()
+    if words >= TEXT_MIN_WORDS or length >= TEXT_MIN_LENGTH:
+        return ColumnInference(name, "text", max(_margin(words, TEXT_MIN_WORDS - 1, TEXT_MIN_WORDS),
+                                                _margin(length, TEXT_MIN_LENGTH / 2, TEXT_MIN_LENGTH)))
+    return ColumnInference(name, "identifier", _margin(ratio, HIGH_CARDINALITY_RATIO, 1 - HIGH_CARDINALITY_RATIO))
+
+
+def _infer_text(name, text: pd.Series) -> ColumnInference:
+    # Zero-padded codes (00123) parse as numbers but must stay text
+    leading_zeros = text.str.match(r"^0\d").mean()
+    numbers = pd.to_numeric(text, errors="coerce")
+    parsed = numbers.notna().mean()
+    if parsed >= NUMERIC_MIN_PARSED and leading_zeros < LEADING_ZERO_RATIO:
+        inference = _infer_numeric(name, numbers.dropna().convert_dtypes(), len(text))
+        if inference.kind == "numeric":
+            return ColumnInference(name, "numeric", parsed, coerce_to="numeric")
+        return inference
+
+    # Cheap check on a few values first; most label columns fail it immediately
+    if parsed < 0.5 and infer_date_format(text.head(DATE_PROBE_ROWS))[1] >= DATE_MIN_PARSED:
+        date_format, date_ratio = infer_date_format(text)
+        # pandas' format-free fallback also reads "January" or "Q3" as dates, so it is
+        # only trusted for columns whose name says they hold dates
+        if date_ratio >= DATE_MIN_PARSED and (date_format is not None or is_date_column(name)):
+            return ColumnInference(name, "datetime", date_ratio, coerce_to="datetime", date_format=date_format)
+
+    return _infer_labels(name, text)
+
+
+def infer_column(name, sample: pd.Series, total_rows: int) -> ColumnInference:
+    dtype = sample.dtype
+    if is_bool_dtype(dtype):
+        return ColumnInference(name, "categorical", 1.0)
+    if is_datetime64_any_dtype(dtype):
+        return ColumnInference(name, "datetime", 1.0)
+    if is_numeric_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+        return _infer_numeric(name, sample.dropna(), total_rows)
+
+    # Text, categoricals (interned text) and mixed objects; sanitize fills missing text
+    # with "", so blanks count as missing
+    text = sample[sample.notna()].astype(str).str.strip()
+    text = text[text != ""]
+    if text.empty:
+        return ColumnInference(name, "empty", 1.0)
+    return _infer_text(name, text)
+
+
+def infer_column_types(df: pd.DataFrame, sample_size: int = INFERENCE_SAMPLE_ROWS, seed: int = 0) -> dict:
+    # Every decision is made on a bounded random sample, so cost doesn't grow with the row count
+    sample = sample_rows(df, sample_size, seed)
+    return {col: infer_column(col, sample[col], len(df)) for col in df.columns}
+
+
+def coerce_inferred_columns(df: pd.DataFrame, inferences: dict) -> list:
+    # Numeric- and date-looking text becomes a real numeric/datetime column, in place
+    coerced = []
+    for col, inference in inferences.items():
+        if inference.coerce_to is None:
+            continue
+        values = df[col]
+        if (inference.coerce_to == "numeric" and is_numeric_dtype(values.dtype)
+                and not isinstance(values.dtype, pd.CategoricalDtype)) \
+                or (inference.coerce_to == "datetime" and is_datetime64_any_dtype(values.dtype)):
+            continue  # already converted, e.g. a frame re-ingested under the same key
+        categorical = isinstance(values.dtype, pd.CategoricalDtype)
+        if categorical:
+            # Convert the categories once and expand through the codes
+            values = values.cat.categories.to_series(index=values.cat.categories)
+        if inference.coerce_to == "numeric":
+            converted = pd.to_numeric(values, errors="coerce")
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                converted = pd.to_datetime(values, format=inference.date_format, errors="coerce")
+        if categorical:
+            codes = df[col].cat.codes.to_numpy()
+            lookup = converted.reset_index(drop=True)
+            if (codes < 0).any() and lookup.dtype.kind in "iu":
+                lookup = lookup.astype(np.float64)  # NumPy ints can't hold the missing labels
+            converted = pd.Series(lookup.array.take(codes, allow_fill=True), index=df.index, name=col)
+        df[col] = converted
+        coerced.append(col)
+    return coerced
+
+
+def column_types_from(inferences: dict) -> dict:
+    kinds = {kind: [] for kind in COLUMN_KINDS}
+    target = {"numeric": "numerical"}
+    for col, inference in inferences.items():
+        kinds[target.get(inference.kind, inference.kind)].append(col)
+        if inference.kind == "high_cardinality":
+            kinds["categorical"].append(col)
+    kinds["inferred"] = {col: inference.as_dict() for col, inference in inferences.items()}
+    return kinds
+
+
+@instrument()
+def detect_column_types(df, dataset_key=None, coerce=False):
+    # Only the inference is cached; the coercion it implies is applied to whichever frame is passed in
+    inferences = None
+    if dataset_key is not None:
+        with _cache_lock:
+            if dataset_key in _cache:
+                _cache.move_to_end(dataset_key)
+                inferences = _cache[dataset_key]
+
+    if inferences is None:
+        inferences = infer_column_types(df)
+        if dataset_key is not None:
+            with _cache_lock:
+                _cache[dataset_key] = inferences
+                while len(_cache) > INFERENCE_CACHE_SIZE:
+                    _cache.popitem(last=False)
+
+    if coerce:
+        coerce_inferred_columns(df, inferences)
+    return column_types_from(inferences)
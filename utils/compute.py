@@ -0,0 +1,305 @@
+import importlib.util
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from utils.aggregation import GroupedSums
+from utils.column_detection import INFERENCE_SAMPLE_ROWS, infer_column_types
+from utils.downsampling import Reduction, histogram_frame
+from utils.instrumentation import instrument
+from utils.profiling import (
+    HISTOGRAM_BINS, PROFILE_CHUNK_ROWS, TOP_K_CAPACITY, ColumnProfile, DatasetProfile, profile_dataframe
+)
+
+OUT_OF_CORE_SAMPLE_ROWS = 200_000
+OUT_OF_CORE_EXTENSIONS = (".parquet", ".csv")
+
+# Period codes shared by both backends; weeks start on Monday in both
+RESAMPLE_FREQS = {"D": "day", "W": "week", "M": "month", "Q": "quarter"}
+
+
+def available_backends() -> list:
+    backends = ["pandas"]
+    if importlib.util.find_spec("duckdb") is not None:
+        backends.append("duckdb")
+    return backends
+
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# --- In-memory ---
+class PandasBackend:
+    """The default: every operation runs on the materialized frame."""
+
+    name = "pandas"
+    out_of_core = False
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    @property
+    def rows(self) -> int:
+        return len(self.df)
+
+    def value_counts(self, col, k: int | None = None) -> pd.Series:
+        counts = self.df[col].value_counts()
+        counts = counts[counts > 0]
+        return counts if k is None else counts.head(k)
+
+    def histogram(self, x, color=None, nbins: int = 20):
+        return histogram_frame(self.df, x, color, nbins)
+
+    def grouped_sums(self, group_cols, value_cols) -> GroupedSums:
+        return GroupedSums(self.df, group_cols, value_cols)
+
+    def column_sums(self, value_cols) -> pd.Series:
+        return self.df[list(value_cols)].sum()
+
+    def resample_sum(self, date_col, value_cols, freq: str | None = None) -> pd.DataFrame:
+        value_cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        data = self.df[[date_col] + value_cols].dropna(subset=[date_col])
+        keys = data[date_col]
+        if freq is not None:
+            stamps = keys.dt.tz_localize(None) if keys.dt.tz is not None else keys
+            keys = stamps.dt.to_period(freq).dt.start_time.rename(date_col)
+        return data[value_cols].groupby(keys).sum().reset_index()
+
+    def sample(self, n: int, seed: int = 0) -> pd.DataFrame:
+        return self.df if len(self.df) <= n else self.df.sample(n, random_state=seed)
+
+    def record_batches(self, batch_rows: int = PROFILE_CHUNK_ROWS):
+        for start in range(0, len(self.df), batch_rows):
+            yield self.df.iloc[start:start + batch_rows]
+
+    def profile(self, skip_top=()):
+        return profile_dataframe(self.df, skip_top=skip_top)
+
+
+# --- Out-of-core ---
+class DuckDBBackend:
+    """Queries a Parquet or CSV file in place; only aggregated rows come back.
+
+    DuckDB streams the file and spills to disk when an aggregation outgrows
+    ``memory_limit``, so the file can be far larger than RAM.
+    """
+
+    name = "duckdb"
+    out_of_core = True
+
+    def __init__(self, path: str, memory_limit: str | None = None, temp_dir: str | None = None):
+        import duckdb
+
+        self.path = path
+        self._conn = duckdb.connect()
+        if memory_limit:
+            self._conn.execute(f"SET memory_limit = '{memory_limit}'")
+        if temp_dir:
+            self._conn.execute(f"SET temp_directory = '{temp_dir}'")
+        literal = "'" + path.replace("'", "''") + "'"
+        reader = "read_parquet" if path.lower().endswith(".parquet") else "read_csv_auto"
+        self._source = f"{reader}({literal})"
+        self._conn.execute(f"CREATE VIEW data AS SELECT * FROM {self._source}")
+        self._lock = threading.Lock()
+        self._rows = None
+        self._dtypes = None
+
+    def apply_inferences(self, inferences: dict):
+        # Numeric- and date-looking text is converted inside the view, as uploads are converted on ingest
+        casts = []
+        for col, inference in inferences.items():
+            if inference.coerce_to == "numeric":
+                casts.append(f"TRY_CAST({_quote(col)} AS DOUBLE) AS {_quote(col)}")
+            elif inference.coerce_to == "datetime" and inference.date_format:
+                fmt = inference.date_format.replace("'", "''")
+                casts.append(f"TRY_STRPTIME({_quote(col)}, '{fmt}') AS {_quote(col)}")
+            elif inference.coerce_to == "datetime":
+                casts.append(f"TRY_CAST({_quote(col)} AS TIMESTAMP) AS {_quote(col)}")
+        if casts:
+            self._conn.execute(f"CREATE OR REPLACE VIEW data AS SELECT * REPLACE ({', '.join(casts)}) "
+                               f"FROM {self._source}")
+            self._dtypes = None
+
+    def _query(self, sql: str, params=None) -> pd.DataFrame:
+        # One cursor per query: worker threads may query the same backend at once
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    @property
+    def rows(self) -> int:
+        if self._rows is None:
+            self._rows = int(self._query("SELECT count(*) AS n FROM data")["n"].iloc[0])
+        return self._rows
+
+    @property
+    def dtypes(self) -> pd.Series:
+        if self._dtypes is None:
+            self._dtypes = self._query("SELECT * FROM data LIMIT 0").dtypes
+        return self._dtypes
+
+    @instrument("duckdb.value_counts")
+    def value_counts(self, col, k: int | None = None) -> pd.Series:
+        limit = f"LIMIT {int(k)}" if k is not None else ""
+        result = self._query(f"SELECT {_quote(col)} AS value, count(*) AS count FROM data "
+                             f"WHERE {_quote(col)} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC {limit}")
+        return pd.Series(result["count"].to_numpy(), index=pd.Index(result["value"], name=col), name="count")
+
+    @instrument("duckdb.histogram")
+    def histogram(self, x, color=None, nbins: int = 20):
+        rows_in = self.rows
+        dtype = self.dtypes[x]
+        keys = [x, color] if color else [x]
+        select = ", ".join(_quote(k) for k in keys)
+        if not (is_numeric_dtype(dtype) or is_datetime64_any_dtype(dtype)) or dtype == bool:
+            counts = self._query(f"SELECT {select}, count(*) AS count FROM data "
+                                 f"WHERE {_quote(x)} IS NOT NULL GROUP BY ALL ORDER BY ALL")
+            return counts, None, Reduction("bars", rows_in, len(counts))
+
+        is_date = is_datetime64_any_dtype(dtype)
+        value = f"epoch_ns({_quote(x)})::DOUBLE" if is_date else f"{_quote(x)}::DOUBLE"
+        bounds = self._query(f"SELECT min({value}) AS lo, max({value}) AS hi FROM data "
+                             f"WHERE isfinite({value})")
+        lo, hi = bounds["lo"].iloc[0], bounds["hi"].iloc[0]
+        if pd.isna(lo):
+            return pd.DataFrame({x: [], "count": []}), None, Reduction("bins", rows_in, 0)
+        # Same edges as np.histogram over the full column
+        edges = np.histogram_bin_edges([lo, hi], bins=nbins)
+        width = edges[1] - edges[0]
+        centres = (edges[:-1] + edges[1:]) / 2
+        counts = self._bin_counts(value, edges, color)
+
+        if color:
+            frames = []
+            for key, group_counts in counts.groupby(color, sort=False):
+                binned = np.zeros(nbins, dtype=np.int64)
+                binned[group_counts["bin"].to_numpy()] = group_counts["count"].to_numpy()
+                frames.append(pd.DataFrame({x: centres, color: key, "count": binned}))
+            binned = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({x: [], color: [], "count": []})
+        else:
+            binned_counts = np.zeros(nbins, dtype=np.int64)
+            binned_counts[counts["bin"].to_numpy()] = counts["count"].to_numpy()
+            binned = pd.DataFrame({x: centres, "count": binned_counts})
+
+        if is_date:
+            binned[x] = pd.to_datetime(binned[x].astype(np.int64))
+            width = width / 1e6  # Plotly date axes are in milliseconds
+        return binned, width, Reduction("bins", rows_in, len(binned))
+
+    def _bin_counts(self, value: str, edges: np.ndarray, color=None) -> pd.DataFrame:
+        # One row per non-empty bin (and colour); the last bin is closed on the right, as in np.histogram
+        nbins = len(edges) - 1
+        bucket = f"least(floor(({value} - $lo) / $width), {nbins - 1})::INTEGER"
+        group = f", {_quote(color)}" if color else ""
+        return self._query(f"SELECT {bucket} AS bin{group}, count(*) AS count FROM data "
+                           f"WHERE isfinite({value}) GROUP BY ALL",
+                           {"lo": float(edges[0]), "width": float(edges[1] - edges[0])})
+
+    @instrument("duckdb.grouped_sums")
+    def grouped_sums(self, group_cols, value_cols) -> GroupedSums:
+        group_cols = [group_cols] if isinstance(group_cols, str) else list(group_cols)
+        value_cols = list(value_cols)
+        sums = "".join(f", coalesce(sum({_quote(v)}), 0) AS {_quote(v)}" for v in value_cols)
+        # Rows with a missing group value are left out, as in the in-memory GroupedSums
+        present = " AND ".join(f"{_quote(g)} IS NOT NULL" for g in group_cols)
+        frame = self._query(f"SELECT {', '.join(_quote(g) for g in group_cols)}{sums}, count(*) AS \"Count\" "
+                            f"FROM data WHERE {present} GROUP BY ALL ORDER BY ALL")
+        return GroupedSums.from_aggregates(frame, group_cols, value_cols)
+
+    def column_sums(self, value_cols) -> pd.Series:
+        value_cols = list(value_cols)
+        if not value_cols:
+            return pd.Series(dtype=np.float64)
+        sums = ", ".join(f"coalesce(sum({_quote(v)}), 0) AS {_quote(v)}" for v in value_cols)
+        return self._query(f"SELECT {sums} FROM data").iloc[0]
+
+    @instrument("duckdb.resample_sum")
+    def resample_sum(self, date_col, value_cols, freq: str | None = None) -> pd.DataFrame:
+        value_cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        key = _quote(date_col)
+        if freq is not None:
+            key = f"date_trunc('{RESAMPLE_FREQS[freq]}', {key})::TIMESTAMP"
+        sums = "".join(f", coalesce(sum({_quote(v)}), 0) AS {_quote(v)}" for v in value_cols)
+        return self._query(f"SELECT {key} AS {_quote(date_col)}{sums} FROM data "
+                           f"WHERE {_quote(date_col)} IS NOT NULL GROUP BY 1 ORDER BY 1")
+
+    def sample(self, n: int, seed: int = 0) -> pd.DataFrame:
+        if self.rows <= n:
+            return self._query("SELECT * FROM data")
+        return self._query(f"SELECT * FROM data USING SAMPLE reservoir({int(n)} ROWS) REPEATABLE ({int(seed)})")
+
+    def record_batches(self, batch_rows: int = PROFILE_CHUNK_ROWS):
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            reader = cursor.execute("SELECT * FROM data").fetch_record_batch(batch_rows)
+            for batch in reader:
+                yield batch.to_pandas()
+        finally:
+            cursor.close()
+
+    @instrument("duckdb.profile")
+    def profile(self, skip_top=()):
+        # Every statistic is an aggregate query; no rows leave DuckDB
+        skip_top = set(skip_top)
+        kinds = {col: ColumnProfile(col, dtype).kind for col, dtype in self.dtypes.items()}
+        stats = ["count(*) AS \"rows\""]
+        for i, (col, kind) in enumerate(kinds.items()):
+            q = _quote(col)
+            if kind == "numeric":
+                # NaN is a missing value here, as in pandas; infinities only count as present
+                present = f"CASE WHEN NOT isnan({q}::DOUBLE) THEN {q} END"
+                finite = f"CASE WHEN isfinite({q}::DOUBLE) THEN {q}::DOUBLE END"
+                stats += [f"count({present}) AS \"n{i}\"", f"approx_count_distinct({present}) AS \"d{i}\"",
+                          f"count({finite}) AS \"c{i}\"", f"min({finite}) AS \"lo{i}\"",
+                          f"max({finite}) AS \"hi{i}\"", f"avg({finite}) AS \"mean{i}\"",
+                          f"var_samp({finite}) AS \"var{i}\""]
+            else:
+                stats += [f"count({q}) AS \"n{i}\"", f"approx_count_distinct({q}) AS \"d{i}\""]
+                if kind == "datetime":
+                    stats += [f"min({q}) AS \"lo{i}\"", f"max({q}) AS \"hi{i}\""]
+        row = self._query(f"SELECT {', '.join(stats)} FROM data").iloc[0]
+
+        profile = DatasetProfile(skip_top)
+        profile.rows = rows = int(row["rows"])
+        for i, (col, kind) in enumerate(kinds.items()):
+            present = int(row[f"n{i}"])
+            summary = dict(rows=rows, nulls=rows - present, distinct=int(row[f"d{i}"]))
+            if kind == "numeric" and int(row[f"c{i}"]):
+                lo, hi = float(row[f"lo{i}"]), float(row[f"hi{i}"])
+                # Same edges as profile_dataframe: np.histogram's over the whole column
+                edges = np.histogram_bin_edges([lo, hi], bins=HISTOGRAM_BINS)
+                counts = self._bin_counts(f"{_quote(col)}::DOUBLE", edges)
+                hist_counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+                hist_counts[counts["bin"].to_numpy()] = counts["count"].to_numpy()
+                variance = row[f"var{i}"]
+                summary.update(minimum=lo, maximum=hi, count=int(row[f"c{i}"]), mean=float(row[f"mean{i}"]),
+                               variance=0.0 if pd.isna(variance) else float(variance),
+                               hist_counts=hist_counts, hist_edges=edges)
+            elif kind == "datetime" and present:
+                summary.update(minimum=row[f"lo{i}"], maximum=row[f"hi{i}"])
+            elif kind == "categorical" and col not in skip_top:
+                # One more than the sketch keeps, so its floor bounds every value left out
+                summary.update(top_counts=self.value_counts(col, TOP_K_CAPACITY + 1))
+            profile.columns[col] = ColumnProfile.from_aggregates(col, self.dtypes[col], **summary)
+        return profile
+
+
+def list_data_files(root: str) -> list:
+    if not root or not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if name.lower().endswith(OUT_OF_CORE_EXTENSIONS))
+
+
+def open_out_of_core(path: str) -> DuckDBBackend:
+    backend = DuckDBBackend(path, memory_limit=os.environ.get("DATA_INSIGHTS_DUCKDB_MEMORY") or None,
+                            temp_dir=os.environ.get("DATA_INSIGHTS_SPILL_DIR") or None)
+    backend.apply_inferences(infer_column_types(backend.sample(INFERENCE_SAMPLE_ROWS)))
+    return backend
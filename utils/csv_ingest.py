@@ -0,0 +1,81 @@
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype
+
+from utils.data_cleaning import (
+    clean_data, drop_duplicate_rows, intern_low_cardinality, is_date_column,
+    parse_date_columns, sanitize_df_for_streamlit, strip_text_columns
+)
+from utils.instrumentation import instrument
+
+STREAMING_THRESHOLD_MB = 50
+CHUNK_ROWS = 200_000
+SAMPLE_ROWS = 10_000
+
+def infer_locked_dtypes(sample: pd.DataFrame) -> dict:
+    # Nullable dtypes so a missing value in a later chunk can't change the column type
+    dtypes = {}
+    for col in sample.columns:
+        if is_date_column(str(col).strip()):
+            dtypes[col] = object
+        elif is_bool_dtype(sample[col]):
+            dtypes[col] = "boolean"
+        elif is_integer_dtype(sample[col]):
+            dtypes[col] = "Int64"
+        elif is_float_dtype(sample[col]):
+            dtypes[col] = "float64"
+        else:
+            dtypes[col] = object
+    return dtypes
+
+def _clean_chunk(chunk: pd.DataFrame, strip_whitespace: bool, parse_dates: bool,
+                 date_formats: dict, logs) -> pd.DataFrame:
+    chunk.columns = [col.strip() for col in chunk.columns]
+    if strip_whitespace:
+        strip_text_columns(chunk)
+    if parse_dates:
+        # Formats inferred on the first chunk are reused for the rest
+        parse_date_columns(chunk, formats=date_formats)
+    # Missing text stays missing until the whole column has been interned
+    return sanitize_df_for_streamlit(chunk, copy=False, logs=logs, fill_text=False)
+
+@instrument()
+def read_csv_streaming(file, strip_whitespace: bool = True, parse_dates: bool = True,
+                       drop_duplicates: bool = True, chunk_rows: int = CHUNK_ROWS,
+                       sample_rows: int = SAMPLE_ROWS, logs: list | None = None) -> pd.DataFrame:
+    start = file.tell()
+    sample = pd.read_csv(file, nrows=sample_rows)
+    dtypes = infer_locked_dtypes(sample)
+    del sample
+
+    file.seek(start)
+    pieces = {}
+    date_formats = {}
+    try:
+        for chunk in pd.read_csv(file, dtype=dtypes, chunksize=chunk_rows):
+            chunk = _clean_chunk(chunk, strip_whitespace, parse_dates, date_formats, logs)
+            # Copy each column out of the chunk so the chunk's blocks can be freed right away
+            for col in chunk.columns:
+                pieces.setdefault(col, []).append(chunk[col].array.copy())
+            del chunk
+    except (ValueError, TypeError):
+        # A later chunk contradicts the sampled dtypes; fall back to a whole-file parse
+        if logs is not None:
+            logs.append("⚠️ Streaming CSV ingest fell back to a full parse (dtype mismatch after sample)")
+        file.seek(start)
+        df = clean_data(pd.read_csv(file), strip_whitespace=strip_whitespace, parse_dates=parse_dates,
+                        drop_duplicates=drop_duplicates, copy=False)
+        return sanitize_df_for_streamlit(df, copy=False, logs=logs)
+
+    # Assemble one column at a time, releasing that column's pieces as we go
+    columns = {}
+    for col in list(pieces):
+        parts = pieces.pop(col)
+        columns[col] = pd.concat([pd.Series(part, copy=False) for part in parts], ignore_index=True)
+        del parts
+
+    df = pd.DataFrame(columns, copy=False)
+    # Interning needs the whole column so every chunk shares one set of categories
+    intern_low_cardinality(df)
+    if drop_duplicates:
+        df = drop_duplicate_rows(df)
+    return sanitize_df_for_streamlit(df, copy=False, logs=logs)
@@ -1,24 +1,231 @@
+import time
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.types import (
+    is_float_dtype, is_bool_dtype,
+    is_datetime64_any_dtype, is_string_dtype,
+    is_object_dtype, is_numeric_dtype
+)
+
+from utils.instrumentation import instrument, stage
+
+DATE_NAME_HINTS = ("date", "joined", "start", "end")
+DATE_FORMATS = (
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d",
+    "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M",
+    "%d-%m-%Y", "%d.%m.%Y", "%d-%b-%Y", "%b %d, %Y",
+)
+DATE_SAMPLE_SIZE = 1000
+DATE_MIN_PARSED = 0.8
+CATEGORY_MAX_DISTINCT = 50   # labels repeated often enough to be worth one shared copy
+
+@contextmanager
+def _timed(timings, step):
+    start = time.perf_counter()
+    try:
+        with stage(f"clean_data.{step}"):
+            yield
+    finally:
+        if timings is not None:
+            timings[step] = timings.get(step, 0.0) + time.perf_counter() - start
+
+def is_date_column(col) -> bool:
+    return any(hint in str(col).lower() for hint in DATE_NAME_HINTS)
+
+def text_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns
+            if (is_object_dtype(df[col]) or is_string_dtype(df[col]))
+            and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+def _strip_series(s: pd.Series) -> pd.Series:
+    try:
+        arr = pa.array(s, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = None
+
+    if arr is not None and (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)):
+        stripped = pc.utf8_trim_whitespace(arr).to_pandas()
+        stripped.index = s.index
+        stripped.name = s.name
+        return stripped
+    if arr is not None and pa.types.is_null(arr.type):
+        return s
+
+    # Mixed Python objects: stringify and strip the non-missing values only
+    present = s.notna()
+    return s.where(~present, s.astype(str).str.strip())
 
-def clean_data(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+def strip_text_columns(df: pd.DataFrame) -> None:
+    for col in text_columns(df):
+        df[col] = _strip_series(df[col])
+
+def infer_date_format(sample: pd.Series):
+    # Returns (format, parsed ratio); format is None when only pandas' own inference works
+    best_format, best_ratio = None, 0.0
+    for fmt in DATE_FORMATS:
+        ratio = pd.to_datetime(sample, format=fmt, errors="coerce").notna().mean()
+        if ratio > best_ratio:
+            best_format, best_ratio = fmt, ratio
+            if ratio == 1.0:
+                break
+    if best_ratio < DATE_MIN_PARSED:
+        best_format = None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            best_ratio = pd.to_datetime(sample, errors="coerce").notna().mean()
+    return best_format, best_ratio
+
+def parse_date_columns(df: pd.DataFrame, formats: dict | None = None) -> dict:
+    # Formats are inferred once on a sample and can be passed back in (e.g. for later chunks)
+    formats = {} if formats is None else formats
+    for col in df.columns:
+        if not is_date_column(col) or is_datetime64_any_dtype(df[col]) or is_numeric_dtype(df[col]):
+            continue
+
+        if col not in formats:
+            values = df[col].dropna()
+            if values.empty:
+                continue
+            sample = values.sample(min(len(values), DATE_SAMPLE_SIZE), random_state=0)
+            fmt, ratio = infer_date_format(sample.astype(str))
+            # Name matched but values don't look like dates (e.g. "Gender" contains "end")
+            formats[col] = fmt if ratio >= DATE_MIN_PARSED else False
+
+        if formats[col] is False:
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            df[col] = pd.to_datetime(df[col], format=formats[col], errors='coerce')
+    return formats
+
+def intern_low_cardinality(df: pd.DataFrame, max_distinct: int = CATEGORY_MAX_DISTINCT) -> None:
+    for col in text_columns(df):
+        codes, uniques = pd.factorize(df[col])
+        if len(df) and len(uniques) <= max_distinct:
+            df[col] = pd.Categorical.from_codes(codes, categories=uniques)
+
+def drop_duplicate_rows(df: pd.DataFrame) -> pd.DataFrame:
+    # Hash each row once; only rows whose hash collides get the exact comparison
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    candidates = row_hashes.duplicated(keep=False).to_numpy()
+    if not candidates.any():
+        return df
+
+    duplicated = np.zeros(len(df), dtype=bool)
+    duplicated[candidates] = df[candidates].duplicated().to_numpy()
+    if duplicated.any():
+        return df[~duplicated]
+    return df
+
+@instrument()
+def clean_data(df: pd.DataFrame, strip_whitespace: bool = True,
+               parse_dates: bool = True, drop_duplicates: bool = True,
+               copy: bool = True, timings: dict | None = None) -> pd.DataFrame:
+    if copy:
+        df = df.copy()
 
     # Clean column names
     df.columns = [col.strip() for col in df.columns]
 
     # Remove leading/trailing whitespace in string data
-    for col in df.select_dtypes(include='object'):
-        df[col] = df[col].astype(str).str.strip()
+    if strip_whitespace:
+        with _timed(timings, "strip_whitespace"):
+            strip_text_columns(df)
 
     # Try to convert columns to datetime if possible
-    for col in df.columns:
-        if "date" in col.lower() or "joined" in col.lower() or "start" in col.lower() or "end" in col.lower():
-            try:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-            except:
-                pass
+    if parse_dates:
+        with _timed(timings, "parse_dates"):
+            parse_date_columns(df)
+
+    # Intern repeated strings (departments, locations, ...) as categoricals
+    with _timed(timings, "intern_categories"):
+        intern_low_cardinality(df)
 
     # Drop duplicate rows
-    df = df.drop_duplicates()
+    if drop_duplicates:
+        with _timed(timings, "drop_duplicates"):
+            df = drop_duplicate_rows(df)
+
+    return df
+
+# --- Arrow conversion ---
+# Object columns whose values pandas infers as one of these convert to Arrow as-is
+ARROW_CLEAN_INFERRED = ("string", "empty")
+
+def _as_text(series: pd.Series) -> pd.Series:
+    # Mixed values become their string form in one pass; missing values become ""
+    text = series.astype(str)
+    if series.hasnans:
+        text = text.mask(series.isna(), "")
+    return text
+
+def arrow_type_for(series: pd.Series) -> pa.DataType:
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pa.dictionary(pa.int32(), pa.array(dtype.categories).type)
+    if is_bool_dtype(dtype):
+        return pa.bool_()
+    if pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    if is_float_dtype(dtype):
+        return pa.float64()
+    if is_datetime64_any_dtype(dtype):
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            return pa.timestamp(dtype.unit, tz=str(dtype.tz))
+        return pa.timestamp(np.datetime_data(dtype)[0])
+    return pa.large_string()
+
+def arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    return pa.schema([pa.field(str(col), arrow_type_for(df[col])) for col in df.columns])
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    # One conversion for the whole frame; st.dataframe takes the table without re-serializing
+    return pa.Table.from_pandas(df, schema=arrow_schema(df), preserve_index=False)
+
+@instrument()
+def sanitize_df_for_streamlit(df: pd.DataFrame, copy: bool = True, logs: list | None = None,
+                              fill_text: bool = True) -> pd.DataFrame:
+    if copy:
+        df = df.copy(deep=False)
+    df.columns = [str(col).strip() for col in df.columns]
+
+    if "Type" in df.columns:
+        df.drop(columns=["Type"], inplace=True)
+
+    # Every column ends up with a dtype arrow_schema maps directly, so nothing
+    # needs a trial conversion and nothing gets dropped
+    coerced = []
+    for col in df.columns:
+        col_data = df[col]
+        dtype = col_data.dtype
+        if isinstance(dtype, pd.CategoricalDtype) or is_datetime64_any_dtype(dtype):
+            continue
+        if is_bool_dtype(dtype):
+            if dtype != np.bool_:
+                df[col] = col_data.fillna(False).astype(bool)
+        elif pd.api.types.is_integer_dtype(dtype):
+            if dtype != np.int64:
+                df[col] = col_data.fillna(0).astype(np.int64)
+        elif is_float_dtype(dtype):
+            if col_data.hasnans or dtype != np.float64:
+                df[col] = col_data.fillna(0.0).astype(np.float64)
+        elif is_string_dtype(dtype) and not is_object_dtype(dtype):
+            if fill_text and col_data.hasnans:
+                df[col] = col_data.fillna("")
+        elif is_object_dtype(dtype) and pd.api.types.infer_dtype(col_data, skipna=True) in ARROW_CLEAN_INFERRED:
+            if fill_text and col_data.hasnans:
+                df[col] = col_data.fillna("")
+        else:
+            # Mixed objects, bytes, timedeltas, periods, intervals, ...
+            df[col] = _as_text(col_data)
+            coerced.append(col)
+
+    if coerced and logs is not None:
+        logs.append(f"⚠️ Converted mixed-type columns to text: {coerced}")
 
     return df
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+
+# Manifest keys of the cleaning options, in display order
+CLEANING_OPTION_LABELS = {
+    "strip_whitespace": "trimmed",
+    "parse_dates": "dates parsed",
+    "drop_duplicates": "deduplicated",
+}
+
+
+def default_store_dir() -> str | None:
+    # Opt-in: uploads are only written to disk when a store directory is configured
+    return os.environ.get("DATA_INSIGHTS_STORE_DIR") or None
+
+
+def describe_options(options: dict | None) -> str:
+    if options is None:
+        return "cleaning options unknown"
+    applied = [label for key, label in CLEANING_OPTION_LABELS.items() if options.get(key)]
+    return ", ".join(applied) if applied else "not cleaned"
+
+
+class DatasetStore:
+    """Cleaned datasets persisted as uncompressed Arrow IPC files.
+
+    Files are reopened through a memory map, so numeric columns come back
+    without being copied or re-parsed. Datasets not opened for ``max_age_seconds``
+    are deleted, and the least recently used go first once the store holds more
+    than ``max_bytes``.
+    """
+
+    def __init__(self, root: str, max_bytes: int | None = None, max_age_seconds: float | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + ".arrow", base + ".json"
+
+    def has(self, key) -> bool:
+        data_path, manifest_path = self._paths(key)
+        return os.path.exists(data_path) and os.path.exists(manifest_path)
+
+    def save(self, key, df: pd.DataFrame, column_types: dict, name: str, sheet=None, options: dict | None = None):
+        data_path, manifest_path = self._paths(key)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # Write to a temp file first so a half-written file is never picked up
+        tmp_path = data_path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, data_path)
+
+        manifest = {
+            "key": key,
+            "name": name,
+            "sheet": sheet,
+            "options": options,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "column_types": column_types,
+            "size_bytes": os.path.getsize(data_path),
+            "saved_at": time.time(),
+        }
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        self.prune(keep=key)
+
+    def open(self, key):
+        data_path, manifest_path = self._paths(key)
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # The manifest's modification time is the dataset's last use
+        os.utime(manifest_path)
+        # The memory map stays alive as long as the returned frame references its buffers
+        source = pa.memory_map(data_path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        df = table.to_pandas(split_blocks=True)
+        return df, manifest["column_types"]
+
+    def list(self) -> list:
+        manifests = []
+        for entry in os.listdir(self.root):
+            if not entry.endswith(".json"):
+                continue
+            key = entry[:-len(".json")]
+            if not self.has(key):
+                continue
+            try:
+                with open(os.path.join(self.root, entry), encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(manifests, key=lambda m: m["saved_at"], reverse=True)
+
+    def delete(self, key):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def prune(self, now: float | None = None, keep=None):
+        now = time.time() if now is None else now
+        datasets = []
+        for manifest in self.list():
+            manifest_path = self._paths(manifest["key"])[1]
+            try:
+                used_at = os.path.getmtime(manifest_path)
+            except OSError:
+                continue
+            datasets.append((used_at, manifest.get("size_bytes", 0), manifest["key"]))
+        total = sum(size for _, size, _ in datasets)
+        for used_at, size, key in sorted(datasets):
+            expired = self.max_age_seconds is not None and now - used_at > self.max_age_seconds
+            over_budget = self.max_bytes is not None and total > self.max_bytes
+            if key == keep or not (expired or over_budget):
+                continue
+            # A dataset open elsewhere keeps its memory map; only the directory entry goes
+            self.delete(key)
+            total -= size
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from utils.instrumentation import instrument
+
+LINE_MAX_POINTS = 2000
+SCATTER_MAX_POINTS = 5000
+DENSITY_MIN_ROWS = 200_000
+DENSITY_BINS = 120
+
+
+class Reduction:
+    def __init__(self, method: str, rows_in: int, rows_out: int):
+        self.method = method
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+
+    @property
+    def reduced(self) -> bool:
+        return self.rows_out < self.rows_in
+
+    def describe(self) -> str:
+        return (f"Showing {self.rows_out:,} {self.method} from {self.rows_in:,} rows "
+                f"({self.rows_out / max(self.rows_in, 1):.2%} of the data sent to the browser)")
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    if is_datetime64_any_dtype(series):
+        stamps = series.dt.tz_localize(None) if series.dt.tz is not None else series
+        stamps = stamps.to_numpy(dtype="datetime64[ns]")
+        values = stamps.astype(np.int64).astype(np.float64)
+        values[np.isnat(stamps)] = np.nan
+        return values
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# --- Line / area: largest-triangle-three-buckets ---
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[prev] - avg_x) * (y[start:end] - y[prev])
+                      - (x[prev] - x[start:end]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+@instrument()
+def reduce_lines(df: pd.DataFrame, x: str, ys, color=None, max_points: int = LINE_MAX_POINTS):
+    ys = [ys] if isinstance(ys, str) else list(ys)
+    rows_in = len(df)
+    if rows_in <= max_points or not ys or not all(is_numeric_dtype(df[y]) for y in ys):
+        return df, Reduction("points", rows_in, rows_in)
+
+    sortable = is_numeric_dtype(df[x]) or is_datetime64_any_dtype(df[x])
+    data = df.sort_values(x, kind="stable") if sortable else df
+
+    groups = data.groupby(color, observed=True, sort=False) if color else [(None, data)]
+    n_groups = max(data[color].nunique(), 1) if color else 1
+    per_group = max(max_points // n_groups, 3)
+
+    kept = []
+    for _, group in groups:
+        group = group.dropna(subset=[x])
+        xs = _as_float(group[x]) if sortable else np.arange(len(group), dtype=np.float64)
+        keep = np.zeros(len(group), dtype=bool)
+        for y in ys:
+            yv = np.nan_to_num(_as_float(group[y]))
+            keep[lttb_indices(xs, yv, per_group)] = True
+        kept.append(group[keep])
+
+    reduced = pd.concat(kept) if kept else data.iloc[:0]
+    return reduced, Reduction("points (LTTB)", rows_in, len(reduced))
+
+
+# --- Histograms: bin on the server, send only bin counts ---
+@instrument()
+def histogram_frame(df: pd.DataFrame, x: str, color=None, nbins: int = 20):
+    rows_in = len(df)
+    if not (is_numeric_dtype(df[x]) or is_datetime64_any_dtype(df[x])) or df[x].dtype == bool:
+        keys = [x, color] if color else [x]
+        counts = df.groupby(keys, observed=True).size().reset_index(name="count")
+        return counts, None, Reduction("bars", rows_in, len(counts))
+
+    values = _as_float(df[x])
+    finite = np.isfinite(values)
+    if not finite.any():
+        return pd.DataFrame({x: [], "count": []}), None, Reduction("bins", rows_in, 0)
+    edges = np.histogram_bin_edges(values[finite], bins=nbins)
+    centres = (edges[:-1] + edges[1:]) / 2
+    width = edges[1] - edges[0]
+
+    if color:
+        frames = []
+        for key, group in df.groupby(color, observed=True, sort=False):
+            group_values = _as_float(group[x])
+            counts, _ = np.histogram(group_values[np.isfinite(group_values)], bins=edges)
+            frames.append(pd.DataFrame({x: centres, color: key, "count": counts}))
+        binned = pd.concat(frames, ignore_index=True)
+    else:
+        counts, _ = np.histogram(values[finite], bins=edges)
+        binned = pd.DataFrame({x: centres, "count": counts})
+
+    if is_datetime64_any_dtype(df[x]):
+        binned[x] = pd.to_datetime(binned[x].astype(np.int64))
+        width = width / 1e6  # Plotly date axes are in milliseconds
+    return binned, width, Reduction("bins", rows_in, len(binned))
+
+
+# --- Scatter: stratified sampling or 2-D density binning ---
+def stratified_sample(df: pd.DataFrame, color=None, max_points: int = SCATTER_MAX_POINTS,
+                      random_state: int = 0) -> pd.DataFrame:
+    if len(df) <= max_points:
+        return df
+    if not color:
+        return df.sample(max_points, random_state=random_state).sort_index()
+    # Every group keeps at least one point; the rest is proportional to group size
+    fraction = max_points / len(df)
+    parts = [group.sample(max(1, int(round(len(group) * fraction))), random_state=random_state)
+             for _, group in df.groupby(color, observed=True, sort=False)]
+    return pd.concat(parts).sort_index()
+
+
+def density_grid(df: pd.DataFrame, x: str, y: str, bins: int = DENSITY_BINS):
+    xs, ys = _as_float(df[x]), _as_float(df[y])
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    counts, x_edges, y_edges = np.histogram2d(xs[finite], ys[finite], bins=bins)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centres, y_centres, counts.T
+
+
+@instrument()
+def reduce_scatter(df: pd.DataFrame, x: str, ys, color=None,
+                   max_points: int = SCATTER_MAX_POINTS, density_min_rows: int = DENSITY_MIN_ROWS):
+    # Returns (method, data, reduction); method is "raw", "sample" or "density"
+    ys = [ys] if isinstance(ys, str) else list(ys)
+    rows_in = len(df)
+    if rows_in <= max_points:
+        return "raw", df, Reduction("points", rows_in, rows_in)
+
+    numeric_xy = len(ys) == 1 and all(is_numeric_dtype(df[c]) and df[c].dtype != bool for c in (x, ys[0]))
+    if not color and numeric_xy and rows_in >= density_min_rows:
+        grid = density_grid(df, x, ys[0])
+        return "density", grid, Reduction("density cells", rows_in, grid[2].size)
+
+    sample = stratified_sample(df, color, max_points)
+    method = "points (stratified sample)" if color else "points (random sample)"
+    return "sample", sample, Reduction(method, rows_in, len(sample))
@@ -0,0 +1,108 @@
+import atexit
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import tempfile
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+_TEMP_DIR = None
+
+
+def available_engines() -> list:
+    # openpyxl is what pandas uses by default; it already opens workbooks read-only
+    engines = []
+    if importlib.util.find_spec("python_calamine") is not None:
+        engines.append("calamine")
+    engines.append("openpyxl")
+    return engines
+
+
+def preferred_engine() -> str:
+    return available_engines()[0]
+
+
+def list_sheet_names(path: str, engine: str) -> list:
+    if engine == "calamine":
+        from python_calamine import CalamineWorkbook
+        return list(CalamineWorkbook.from_path(path).sheet_names)
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def read_sheet(path: str, sheet_name: str, engine: str) -> pd.DataFrame:
+    return pd.read_excel(path, sheet_name=sheet_name, engine=engine)
+
+
+def create_sheet_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    # spawn, not fork: the Streamlit server process is multi-threaded
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _temp_dir() -> str:
+    global _TEMP_DIR
+    if _TEMP_DIR is None:
+        _TEMP_DIR = tempfile.mkdtemp(prefix="data_insights_xlsx_")
+        atexit.register(shutil.rmtree, _TEMP_DIR, ignore_errors=True)
+    return _TEMP_DIR
+
+
+class WorkbookIngest:
+    """One uploaded workbook, opened once and parsed sheet by sheet in the background.
+
+    Every sheet is submitted to ``pool`` as soon as the workbook is opened, in
+    workbook order so the sheet shown by default comes first, and switching
+    sheets later usually finds the frame already parsed. A parsed sheet is handed
+    out once, then dropped; the workbook's temp file goes when it is closed or
+    garbage collected.
+    """
+
+    def __init__(self, data, file_hash: str, pool: ProcessPoolExecutor | None = None,
+                 engine: str | None = None):
+        self.engine = engine or preferred_engine()
+        # A file of its own, so a reopened workbook never shares it with one being closed
+        fd, self.path = tempfile.mkstemp(prefix=f"{file_hash}_", suffix=".xlsx", dir=_temp_dir())
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+        self.sheet_names = list_sheet_names(self.path, self.engine)
+        self.pool = pool
+        self._futures = {}
+        if pool is not None:
+            for name in self.sheet_names:
+                self._futures[name] = pool.submit(read_sheet, self.path, name, self.engine)
+
+    def read(self, sheet_name: str) -> pd.DataFrame:
+        # The caller caches the cleaned frame, so the raw one isn't kept here too;
+        # a later read (after that cache evicted it) parses the sheet again
+        future = self._futures.pop(sheet_name, None)
+        if future is None:
+            return read_sheet(self.path, sheet_name, self.engine)
+        try:
+            return future.result()
+        except Exception:
+            # A dead or broken worker shouldn't stop the sheet from loading
+            return read_sheet(self.path, sheet_name, self.engine)
+
+    def close(self):
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._finalizer()
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,209 @@
+import gzip
+import importlib.util
+import io
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data_cleaning import arrow_schema
+from utils.instrumentation import instrument
+
+EXPORT_CHUNK_ROWS = 100_000      # rows formatted at a time; also one Parquet row group
+EXCEL_MAX_ROWS = 1_048_575       # a sheet's row limit, less the header
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+EXPORT_WORKERS = 1               # exports queue behind each other instead of competing with charts
+APP_STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+STATIC_MAX_BYTES = 200 * 1024 ** 2   # Streamlit won't serve a larger static file
+
+
+class ExportFormat:
+    def __init__(self, label: str, extension: str, mime: str, requires: str | None = None):
+        self.label = label
+        self.extension = extension
+        self.mime = mime
+        self.requires = requires
+
+    @property
+    def available(self) -> bool:
+        return self.requires is None or importlib.util.find_spec(self.requires) is not None
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("CSV", ".csv", "text/csv"),
+    "csv.gz": ExportFormat("CSV (gzip)", ".csv.gz", "application/gzip"),
+    "csv.zst": ExportFormat("CSV (zstd)", ".csv.zst", "application/zstd", requires="zstandard"),
+    "xlsx": ExportFormat("Excel (.xlsx)", ".xlsx",
+                         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", requires="xlsxwriter"),
+    "parquet": ExportFormat("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def available_formats() -> list:
+    return [fmt for fmt, spec in EXPORT_FORMATS.items() if spec.available]
+
+
+def default_export_dir() -> str:
+    return os.environ.get("DATA_INSIGHTS_EXPORT_DIR") or os.path.join(APP_STATIC_DIR, "exports")
+
+
+def static_url_prefix(root: str) -> str | None:
+    # With server.enableStaticServing, Streamlit streams files under ./static from disk at app/static/
+    relative = os.path.relpath(os.path.abspath(root), APP_STATIC_DIR)
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return None
+    return "app/static/" + relative.replace(os.sep, "/")
+
+
+# --- Writers: each takes an iterable of DataFrame chunks, so only one chunk is formatted at a time ---
+def write_csv(chunks, path: str, compression: str | None = None):
+    with open(path, "wb") as raw:
+        if compression == "gzip":
+            binary = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL)
+        elif compression == "zstd":
+            import zstandard
+            binary = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+        else:
+            binary = raw
+        # Closing the wrapper closes the compressor, which writes its trailer
+        with io.TextIOWrapper(binary, encoding="utf-8", newline="") as text:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(text, index=False, header=i == 0)
+
+
+def write_xlsx(chunks, path: str, sheet_name: str = "CleanedData"):
+    import xlsxwriter
+
+    # constant_memory flushes each row to disk as soon as the next one starts
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "remove_timezone": True,
+                                          "nan_inf_to_errors": True,
+                                          "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+    try:
+        sheet = workbook.add_worksheet(sheet_name)
+        row = 0
+        for chunk in chunks:
+            if row == 0:
+                sheet.write_row(0, 0, [str(col) for col in chunk.columns])
+                row = 1
+            if row - 1 + len(chunk) > EXCEL_MAX_ROWS:
+                raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; use CSV or Parquet instead")
+            # Missing values become empty cells
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for record in values.itertuples(index=False, name=None):
+                sheet.write_row(row, 0, record)
+                row += 1
+    finally:
+        workbook.close()
+
+
+def write_parquet(chunks, path: str, row_group_rows: int = EXPORT_CHUNK_ROWS):
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                # Text and categorical columns are dictionary-encoded, so repeated labels are stored once
+                schema = arrow_schema(chunk)
+                writer = pq.ParquetWriter(path, schema, compression="zstd", use_dictionary=True)
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            writer.write_table(table, row_group_size=row_group_rows)
+        if writer is None:
+            pq.write_table(pa.table({}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {
+    "csv": lambda chunks, path: write_csv(chunks, path),
+    "csv.gz": lambda chunks, path: write_csv(chunks, path, compression="gzip"),
+    "csv.zst": lambda chunks, path: write_csv(chunks, path, compression="zstd"),
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+}
+
+
+class ExportStore:
+    """Finished exports on disk, one file per (dataset key, format).
+
+    Each export is written once, to a temp file renamed into place, so every
+    later download of the same dataset and format reuses the file. Files not
+    used for ``max_age_seconds`` are deleted, and the least recently used go
+    first once the store holds more than ``max_bytes``.
+    """
+
+    def __init__(self, root: str, max_bytes: int | None = None, max_age_seconds: float | None = None,
+                 url_prefix: str | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.url_prefix = url_prefix
+        os.makedirs(root, exist_ok=True)
+        self._writing = {}
+        self._lock = threading.Lock()
+
+    def path(self, key, fmt: str) -> str:
+        return os.path.join(self.root, key + EXPORT_FORMATS[fmt].extension)
+
+    def has(self, key, fmt: str) -> bool:
+        return os.path.exists(self.path(key, fmt))
+
+    @instrument("export")
+    def export(self, key, fmt: str, chunks) -> str:
+        path = self.path(key, fmt)
+        with self._lock:
+            key_lock = self._writing.setdefault((key, fmt), threading.Lock())
+        # Single flight: a second request for the same export waits for the first to finish
+        with key_lock:
+            if not os.path.exists(path):
+                tmp_path = path + ".tmp"
+                try:
+                    _WRITERS[fmt](chunks, tmp_path)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        self.prune(keep=path)
+        return path
+
+    def url(self, key, fmt: str) -> str | None:
+        # Served by path, so the file never passes through the app's memory
+        if self.url_prefix is None or self.size(key, fmt) > STATIC_MAX_BYTES:
+            return None
+        return f"{self.url_prefix}/{key}{EXPORT_FORMATS[fmt].extension}"
+
+    def read(self, key, fmt: str) -> bytes:
+        with open(self.path(key, fmt), "rb") as f:
+            return f.read()
+
+    def size(self, key, fmt: str) -> int:
+        return os.path.getsize(self.path(key, fmt))
+
+    def touch(self, key, fmt: str):
+        # Offered for download again: move it to the back of the eviction order
+        try:
+            os.utime(self.path(key, fmt))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, now: float | None = None, keep: str | None = None):
+        now = time.time() if now is None else now
+        files = []
+        for entry in os.scandir(self.root):
+            # Exports still being written end in .tmp and are left alone
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files):
+            expired = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            over_budget = self.max_bytes is not None and total > self.max_bytes
+            if path == keep or not (expired or over_budget):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
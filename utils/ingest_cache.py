@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+def content_hash(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def make_cache_key(file_hash, sheet_name=None, options=None) -> str:
+    raw = json.dumps([file_hash, sheet_name, options or {}], sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def enable_copy_on_write():
+    # pandas 3 always copies on write; on pandas 2 shallow views would otherwise
+    # let one session's in-place edit leak into every other session's frame
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+class IngestCache:
+    """Cleaned frames and their column-type maps, keyed by upload content.
+
+    Entries are kept in memory up to ``max_bytes`` and evicted least recently
+    used first. When ``spill_dir`` is set, evicted entries are written there as
+    Parquet and promoted back into memory (and off disk) on their next lookup.
+
+    One instance is shared by every session in the process. Callers get shallow,
+    copy-on-write views of the cached frame, so N sessions on one dataset hold
+    one copy of its data. Sessions ``acquire`` the key they are viewing, which pins
+    the entry against budget eviction; unpinned entries idle for longer than
+    ``idle_seconds`` are dropped along with their spill files, and sessions not
+    seen for that long are released. Concurrent loads of the same key run the
+    loader once. Spill reads and writes happen outside the cache-wide lock.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: str | None = None, idle_seconds: float | None = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.idle_seconds = idle_seconds
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._last_used = {}
+        self._refs = {}
+        self._session_seen = {}
+        self._loading = {}
+        self._spilling = {}
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "spill_hits": 0, "coalesced_loads": 0,
+                      "evictions": 0, "idle_evictions": 0, "spills": 0}
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def get(self, key):
+        found = self._lookup(key)
+        if found is None and self.spill_dir:
+            with self._key_locked(key):
+                found = self._lookup(key, count=False) or self._promote(key)
+        if found is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        return self._view(*found)
+
+    def put(self, key, df: pd.DataFrame, column_types: dict):
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[2]
+            victims = self._insert(key, df, column_types, nbytes)
+        self._spill(victims)
+
+    def get_or_load(self, key, loader):
+        self.evict_idle()
+        found = self._lookup(key)
+        if found is None:
+            # Single flight: a second session asking for the same key waits for the first load
+            with self._key_locked(key):
+                found = self._lookup(key, count=False)
+                if found is not None:
+                    with self._lock:
+                        self.stats["coalesced_loads"] += 1
+                else:
+                    found = self._promote(key)
+                if found is None:
+                    with self._lock:
+                        self.stats["misses"] += 1
+                    found = loader()
+                    self.put(key, *found)
+        return self._view(*found)
+
+    # --- Sessions ---
+    def acquire(self, key, session_id):
+        with self._lock:
+            self._refs.setdefault(key, set()).add(session_id)
+            self._session_seen[session_id] = time.monotonic()
+
+    def release(self, key, session_id):
+        with self._lock:
+            sessions = self._refs.get(key)
+            if sessions is not None:
+                sessions.discard(session_id)
+                if not sessions:
+                    del self._refs[key]
+            self._last_used[key] = time.monotonic()
+
+    def touch(self, session_id):
+        with self._lock:
+            self._session_seen[session_id] = time.monotonic()
+
+    def refcount(self, key) -> int:
+        with self._lock:
+            return len(self._refs.get(key, ()))
+
+    def evict_idle(self, now: float | None = None):
+        if self.idle_seconds is None:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            # Streamlit doesn't tell us when a browser tab goes away; silence means it did
+            for session_id, seen in list(self._session_seen.items()):
+                if now - seen > self.idle_seconds:
+                    del self._session_seen[session_id]
+                    for key in list(self._refs):
+                        self.release(key, session_id)
+            # Spilled keys keep their last-used time, so idle ones leave the disk too
+            idle = [key for key, used in self._last_used.items()
+                    if key not in self._refs and now - used > self.idle_seconds]
+            for key in idle:
+                del self._last_used[key]
+                self._spilling.pop(key, None)
+                if key in self._entries:
+                    self._nbytes -= self._entries.pop(key)[2]
+                    self.stats["idle_evictions"] += 1
+        for key in idle:
+            self._remove_spill(key)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "pinned_entries": sum(1 for key in self._entries if key in self._refs),
+                "sessions": len(self._session_seen),
+                "memory_mb": round(self._nbytes / 1024 ** 2, 2),
+                "budget_mb": round(self.max_bytes / 1024 ** 2, 2),
+                "idle_minutes": "disabled" if self.idle_seconds is None else round(self.idle_seconds / 60, 1),
+                "spill_dir": self.spill_dir or "disabled",
+            }
+
+    # --- Internals ---
+    @contextmanager
+    def _key_locked(self, key):
+        # Per-key lock, shared by everyone waiting on the key and dropped with the last of them
+        with self._lock:
+            entry = self._loading.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1] and self._loading.get(key) is entry:
+                    del self._loading[key]
+
+    def _lookup(self, key, count: bool = True):
+        # Memory only; nothing here touches the disk
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self._last_used[key] = time.monotonic()
+            if count:
+                self.stats["hits"] += 1
+            df, column_types, _ = self._entries[key]
+            return df, column_types
+
+    def _promote(self, key):
+        # Called under the key's lock, so one session reads a spilled entry back
+        with self._lock:
+            pending = self._spilling.get(key)
+        # An entry still being written out is taken straight from memory
+        found = pending or self._read_spill(key)
+        if found is None:
+            return None
+        with self._lock:
+            self.stats["spill_hits"] += 1
+        self.put(key, *found)
+        self._remove_spill(key)
+        return found
+
+    @staticmethod
+    def _view(df, column_types):
+        # Shallow copy: a new frame object over the cached buffers; writes copy, not mutate
+        return df.copy(deep=False), dict(column_types)
+
+    def _insert(self, key, df, column_types, nbytes):
+        # Called under self._lock; returns the entries to spill once the lock is released
+        self._entries[key] = (df, column_types, nbytes)
+        self._last_used[key] = time.monotonic()
+        self._nbytes += nbytes
+
+        # Always keep the newest entry, even if it alone exceeds the budget, and
+        # never evict a dataset a session is still looking at
+        victims = []
+        while self._nbytes > self.max_bytes:
+            victim = next((k for k in self._entries if k != key and k not in self._refs), None)
+            if victim is None:
+                break
+            old_df, old_types, old_nbytes = self._entries.pop(victim)
+            self._nbytes -= old_nbytes
+            self.stats["evictions"] += 1
+            if self.spill_dir:
+                self._spilling[victim] = (old_df, old_types)
+                victims.append((victim, old_df, old_types))
+            else:
+                self._last_used.pop(victim, None)
+        return victims
+
+    def _spill(self, victims):
+        for key, df, column_types in victims:
+            written = self._write_spill(key, df, column_types)
+            with self._lock:
+                if self._spilling.get(key, (None,))[0] is df:
+                    del self._spilling[key]
+                if written:
+                    self.stats["spills"] += 1
+                # Promoted or dropped for idleness while it was being written
+                stale = key in self._entries or key not in self._last_used
+            if stale:
+                self._remove_spill(key)
+
+    def _spill_paths(self, key):
+        base = os.path.join(self.spill_dir, key)
+        return base + ".parquet", base + ".json"
+
+    def _write_spill(self, key, df, column_types) -> bool:
+        data_path, types_path = self._spill_paths(key)
+        try:
+            # Written beside the final paths and renamed, so a reader never sees half a file
+            df.to_parquet(data_path + ".tmp", index=False)
+            with open(types_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(column_types, f)
+            os.replace(data_path + ".tmp", data_path)
+            os.replace(types_path + ".tmp", types_path)
+            return True
+        except Exception:
+            for path in (data_path + ".tmp", types_path + ".tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+            return False
+
+    def _read_spill(self, key):
+        if not self.spill_dir:
+            return None
+        data_path, types_path = self._spill_paths(key)
+        try:
+            with open(types_path, encoding="utf-8") as f:
+                column_types = json.load(f)
+            df = pd.read_parquet(data_path)
+        except (OSError, ValueError):
+            return None
+        return df, column_types
+
+    def _remove_spill(self, key):
+        if not self.spill_dir:
+            return
+        for path in self._spill_paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,275 @@
+import contextvars
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+PERF_HISTORY_LIMIT = 20
+PROFILE_TOP_N = 40
+
+# The recorder for the rerun running on this thread; Streamlit runs each session's script in its own thread
+_current = contextvars.ContextVar("perf_recorder", default=None)
+
+
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+def _figure_in(value):
+    if isinstance(value, go.Figure):
+        return value
+    if isinstance(value, tuple):
+        return next((item for item in value if isinstance(item, go.Figure)), None)
+    return None
+
+
+def frame_memory(data) -> int:
+    usage = data.memory_usage(index=True, deep=True)
+    return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+
+
+class Stage:
+    __slots__ = ("name", "depth", "thread", "start", "wall", "cpu",
+                 "rows_in", "rows_out", "memory_bytes", "figure_bytes", "_output")
+
+    def __init__(self, name: str, depth: int, start: float, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.thread = threading.get_ident()
+        self.start = start
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.memory_bytes = None
+        self.figure_bytes = None
+        self._output = None
+
+    def output(self, value):
+        # The stage's result; measured for rows, memory and figure size once the timer stops
+        self._output = value
+        rows = _rows(value)
+        if rows is not None:
+            self.rows_out = rows
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "start_ms": round(self.start * 1000, 3),
+            "wall_ms": round(self.wall * 1000, 3),
+            "cpu_ms": round(self.cpu * 1000, 3),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "memory_bytes": self.memory_bytes,
+            "figure_bytes": self.figure_bytes,
+        }
+
+
+class Recorder:
+    """Stages recorded during one rerun.
+
+    ``memory_usage(deep=True)`` and ``fig.to_json()`` cost about as much as the work
+    they measure, so both are opt-in and run outside the timed window.
+    """
+
+    def __init__(self, label: str = "", measure_memory: bool = False,
+                 measure_figures: bool = False, profile: bool = False):
+        self.label = label
+        self.measure_memory = measure_memory
+        self.measure_figures = measure_figures
+        self.created = time.time()
+        self.wall = None
+        self.stages = []
+        self.profile_stats = None
+        self._origin = time.perf_counter()
+        self._depths = {}  # per thread: worker jobs nest independently of the script thread
+        self._lock = threading.Lock()
+        self._profiler = None
+        if profile:
+            try:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            except ValueError:
+                # Another session's rerun is already being profiled
+                self._profiler = None
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def add(self, record: Stage):
+        with self._lock:
+            self.stages.append(record)
+
+    def finish(self):
+        self.wall = self.now()
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+            self.profile_stats = out.getvalue()
+            self._profiler = None
+
+    def summary_frame(self) -> pd.DataFrame:
+        rows = []
+        # Stages are stored as they finish; list them in start order so nesting reads top-down
+        for record in sorted(self.stages, key=lambda r: r.start):
+            rows.append({
+                "Stage": "  " * record.depth + record.name,
+                "Wall (ms)": round(record.wall * 1000, 1),
+                "CPU (ms)": round(record.cpu * 1000, 1),
+                "Rows in": record.rows_in,
+                "Rows out": record.rows_out,
+                "Memory (MB)": None if record.memory_bytes is None else round(record.memory_bytes / 1024 ** 2, 2),
+                "Figure (KB)": None if record.figure_bytes is None else round(record.figure_bytes / 1024, 1),
+            })
+        frame = pd.DataFrame(rows, columns=["Stage", "Wall (ms)", "CPU (ms)", "Rows in", "Rows out",
+                                            "Memory (MB)", "Figure (KB)"])
+        return frame.astype({"Rows in": "Int64", "Rows out": "Int64",
+                             "Memory (MB)": "Float64", "Figure (KB)": "Float64"})
+
+    def as_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "created": self.created,
+            "wall_ms": None if self.wall is None else round(self.wall * 1000, 3),
+            "stages": [record.as_dict() for record in self.stages],
+        }
+
+
+def make_perf_history(limit: int = PERF_HISTORY_LIMIT) -> deque:
+    return deque(maxlen=limit)
+
+
+def start_rerun(label: str = "", **options) -> Recorder:
+    recorder = Recorder(label, **options)
+    _current.set(recorder)
+    return recorder
+
+
+def current_recorder() -> Recorder | None:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str, data=None, rows_in=None):
+    recorder = _current.get()
+    if recorder is None:
+        # Not recording: hand out a throwaway record so callers needn't check
+        yield Stage(name, 0, 0.0, rows_in)
+        return
+
+    thread = threading.get_ident()
+    depth = recorder._depths.get(thread, 0)
+    record = Stage(name, depth, recorder.now(), rows_in if rows_in is not None else _rows(data))
+    recorder._depths[thread] = depth + 1
+    # Per-thread: stages run concurrently on the worker pool, and process time would count every thread
+    cpu_start = time.thread_time()
+    try:
+        yield record
+    finally:
+        record.cpu = time.thread_time() - cpu_start
+        record.wall = recorder.now() - record.start
+        recorder._depths[thread] = depth
+        output = record._output
+        record._output = None
+        if recorder.measure_memory and isinstance(output, (pd.DataFrame, pd.Series)):
+            record.memory_bytes = frame_memory(output)
+        figure = _figure_in(output)
+        if recorder.measure_figures and figure is not None:
+            record.figure_bytes = len(figure.to_json())
+        recorder.add(record)
+
+
+def instrument(name: str | None = None):
+    """Decorator form of ``stage``; rows come from the first frame argument and the return value."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            data = next((arg for arg in args if isinstance(arg, (pd.DataFrame, pd.Series))), None)
+            with stage(label, data) as record:
+                result = fn(*args, **kwargs)
+                record.output(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def plotly_chart(fig, **kwargs):
+    # Streamlit serializes the figure inside this call, so its time is the serialization cost
+    with stage("st.plotly_chart") as record:
+        st.plotly_chart(fig, **kwargs)
+        record.output(fig)
+
+
+# --- Export ---
+def history_json(history) -> str:
+    return json.dumps([recorder.as_dict() for recorder in history], indent=2)
+
+
+def chrome_trace(history) -> str:
+    # Trace Event Format; open in chrome://tracing or https://ui.perfetto.dev
+    events = []
+    if not history:
+        return json.dumps({"traceEvents": events})
+    origin = min(recorder.created for recorder in history)
+    for recorder in history:
+        offset_us = (recorder.created - origin) * 1e6
+        if recorder.wall is not None:
+            events.append({"name": f"rerun {recorder.label}".strip(), "cat": "rerun", "ph": "X", "pid": 1,
+                           "tid": 0, "ts": offset_us, "dur": recorder.wall * 1e6})
+        for record in recorder.stages:
+            args = {k: v for k, v in record.as_dict().items()
+                    if k in ("rows_in", "rows_out", "memory_bytes", "figure_bytes", "cpu_ms") and v is not None}
+            events.append({"name": record.name, "cat": "stage", "ph": "X", "pid": 1, "tid": record.thread,
+                           "ts": offset_us + record.start * 1e6, "dur": record.wall * 1e6, "args": args})
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+# --- Sidebar panel ---
+def render_performance_panel(recorder: Recorder, history):
+    with st.sidebar.expander("⏱️ Performance"):
+        if recorder.wall is not None:
+            st.caption(f"Last rerun ({recorder.label}): {recorder.wall * 1000:,.0f} ms wall, "
+                       f"{len(recorder.stages)} stages")
+        if recorder.stages:
+            st.dataframe(recorder.summary_frame(), use_container_width=True, hide_index=True)
+
+        st.checkbox("Measure frame memory (deep)", key="perf_measure_memory",
+                    help="Adds memory_usage(deep=True) per stage output; slow on wide text data")
+        st.checkbox("Measure figure JSON size", key="perf_measure_figures",
+                    help="Serializes each figure once more to count its bytes")
+        if st.button("🔬 Profile the next rerun"):
+            st.session_state.perf_profile_next = True
+            st.rerun()
+
+        # Serialized only when clicked; the snapshot keeps later reruns out of this download
+        snapshot = list(history)
+        st.download_button("⬇️ Timings (JSON)", data=lambda: history_json(snapshot),
+                           file_name="performance.json", mime="application/json", on_click="ignore")
+        st.download_button("⬇️ Chrome trace", data=lambda: chrome_trace(snapshot),
+                           file_name="performance.trace.json", mime="application/json", on_click="ignore")
+
+        # The profiled rerun may have ended in st.rerun(), so its stats show on the one after
+        profiled = next((r for r in reversed(history) if r.profile_stats), None)
+        if profiled is not None:
+            if profiled is not recorder:
+                st.caption(f"Profile of an earlier rerun ({profiled.label})")
+            st.download_button("⬇️ cProfile stats", data=profiled.profile_stats,
+                               file_name="profile.txt", mime="text/plain")
+            st.code(profiled.profile_stats, language=None)
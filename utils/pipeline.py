@@ -0,0 +1,50 @@
+from collections import deque
+
+DEBUG_LOG_LIMIT = 200
+
+
+def make_debug_log(limit: int = DEBUG_LOG_LIMIT) -> deque:
+    # Ring buffer: long sessions keep only the most recent entries
+    return deque(maxlen=limit)
+
+
+class Page:
+    def __init__(self, render, needs=()):
+        self.render = render
+        self.needs = tuple(needs)
+
+
+class LazyDataset:
+    """Derived data for one dataset, computed on first access.
+
+    ``loader`` returns ``(df, column_types)``; every other artifact is built by
+    the matching function in ``artifacts``. Values are memoized for the rerun;
+    memoization across reruns comes from the loaders themselves (ingest cache,
+    ``st.cache_resource``).
+    """
+
+    def __init__(self, key: str, loader, artifacts: dict):
+        self.key = key
+        self._loader = loader
+        self._artifacts = artifacts
+        self._values = {}
+
+    def get(self, name: str):
+        if name not in self._values:
+            if name in ("df", "column_types"):
+                self._values["df"], self._values["column_types"] = self._loader()
+            else:
+                self._values[name] = self._artifacts[name](self)
+        return self._values[name]
+
+    def prefetch(self, names):
+        for name in names:
+            self.get(name)
+
+    @property
+    def df(self):
+        return self.get("df")
+
+    @property
+    def column_types(self):
+        return self.get("column_types")
@@ -0,0 +1,291 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+)
+
+from utils.instrumentation import instrument
+
+HLL_PRECISION = 12
+TOP_K_CAPACITY = 64
+HISTOGRAM_BINS = 20
+PROFILE_CHUNK_ROWS = 500_000
+
+# --- Sketches ---
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        over = values >= (np.uint64(1) << np.uint64(shift))
+        length[over] += shift
+        values[over] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        tail_bits = 64 - self.precision
+        buckets = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        ranks = (tail_bits - _bit_length(tail) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class SpaceSaving:
+    # Mergeable heavy-hitter summary: any value whose true count exceeds
+    # ``floor`` is guaranteed to be present, with count over-estimated by at most ``floor``.
+    def __init__(self, capacity: int = TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.floor = 0
+
+    def add_counts(self, counts: pd.Series):
+        chunk = SpaceSaving(self.capacity)
+        chunk.counts, chunk.floor = self._truncate(counts.astype(np.int64), 0)
+        self.merge(chunk)
+
+    def merge(self, other: "SpaceSaving"):
+        if other.counts.empty:
+            return
+        if self.counts.empty:
+            self.counts, self.floor = other.counts.copy(), other.floor
+            return
+        left, right = self.counts.align(other.counts)
+        merged = left.fillna(self.floor) + right.fillna(other.floor)
+        self.counts, self.floor = self._truncate(merged.astype(np.int64), self.floor + other.floor)
+
+    def top(self, k: int) -> pd.Series:
+        return self.counts.head(k)
+
+    def _truncate(self, counts: pd.Series, floor: int):
+        counts = counts.sort_values(ascending=False, kind="stable")
+        if len(counts) > self.capacity:
+            floor = max(floor, int(counts.iloc[self.capacity]))
+            counts = counts.iloc[:self.capacity]
+        return counts, floor
+
+
+# --- Column and dataset profiles ---
+def numeric_ranges(df: pd.DataFrame) -> dict:
+    # Cheap pre-pass: the finite min/max of every numeric column, so all chunks share one set of bin edges
+    ranges = {}
+    for col in df.columns:
+        if is_bool_dtype(df[col].dtype) or not is_numeric_dtype(df[col].dtype):
+            continue
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if len(values):
+            ranges[col] = (float(values.min()), float(values.max()))
+    return ranges
+
+
+class ColumnProfile:
+    def __init__(self, name, dtype, bins: int = HISTOGRAM_BINS, track_top: bool = True, hist_range=None):
+        self.name = name
+        self.dtype = dtype
+        self.bins = bins
+        if is_bool_dtype(dtype):
+            self.kind = "categorical"
+        elif is_numeric_dtype(dtype):
+            self.kind = "numeric"
+        elif is_datetime64_any_dtype(dtype):
+            self.kind = "datetime"
+        else:
+            self.kind = "categorical"
+
+        self.rows = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        # Top-k of an ID or free-text column is all ties; skipping it saves a value_counts per chunk
+        self.top = SpaceSaving() if self.kind == "categorical" and track_top else None
+        self.minimum = None
+        self.maximum = None
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.hist_counts = None
+        self.hist_edges = None
+        self.distinct_estimate = None
+        if self.kind == "numeric" and hist_range is not None:
+            # Same edges np.histogram would pick over the whole column
+            self.hist_edges = np.histogram_bin_edges(np.asarray(hist_range, dtype=np.float64), bins=bins)
+            self.hist_counts = np.zeros(bins, dtype=np.int64)
+
+    @classmethod
+    def from_aggregates(cls, name, dtype, rows: int, nulls: int, distinct: int, minimum=None, maximum=None,
+                        count: int = 0, mean: float = 0.0, variance: float = 0.0,
+                        hist_counts=None, hist_edges=None, top_counts=None, bins: int = HISTOGRAM_BINS):
+        # Statistics already computed elsewhere (e.g. by an out-of-core engine). There are no
+        # HyperLogLog registers behind ``distinct``, so such a profile can't be merged.
+        column = cls(name, dtype, bins=bins, track_top=top_counts is not None)
+        column.rows, column.nulls = int(rows), int(nulls)
+        column.distinct_estimate = int(distinct)
+        column.minimum, column.maximum = minimum, maximum
+        if count:
+            column.count, column.mean = int(count), float(mean)
+            column.m2 = float(variance) * (column.count - 1) if column.count > 1 else 0.0
+        if hist_counts is not None:
+            column.hist_counts, column.hist_edges = np.asarray(hist_counts, dtype=np.int64), hist_edges
+        if column.top is not None:
+            column.top.add_counts(top_counts)
+        return column
+
+    def update(self, series: pd.Series):
+        if self.distinct_estimate is not None:
+            raise ValueError(f"{self.name!r} was built from aggregates and can't take more rows")
+        self.rows += len(series)
+        present = series.notna()
+        values = series[present]
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+
+        self.hll.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+        if self.top is not None:
+            counts = values.value_counts(sort=False)
+            self.top.add_counts(counts[counts > 0])
+        elif self.kind == "datetime":
+            self._update_range(values.min(), values.max())
+        elif self.kind == "numeric":
+            self._update_numeric(values.to_numpy(dtype=np.float64))
+
+    def merge(self, other: "ColumnProfile"):
+        if self.distinct_estimate is not None or other.distinct_estimate is not None:
+            raise ValueError(f"{self.name!r} was built from aggregates and can't be merged")
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.hll.merge(other.hll)
+        if self.top is not None:
+            self.top.merge(other.top)
+        if other.minimum is not None:
+            self._update_range(other.minimum, other.maximum)
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2)
+            self._merge_histogram(other.hist_counts, other.hist_edges)
+
+    @property
+    def missing_pct(self) -> float:
+        return round(self.nulls / self.rows * 100, 2) if self.rows else 0.0
+
+    @property
+    def distinct(self) -> int:
+        if self.distinct_estimate is not None:
+            return self.distinct_estimate
+        return self.hll.estimate()
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def top_values(self, k: int = 10) -> pd.Series:
+        return self.top.top(k) if self.top is not None else pd.Series(dtype=np.int64)
+
+    def _update_range(self, low, high):
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def _update_numeric(self, values: np.ndarray):
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self._update_range(float(values.min()), float(values.max()))
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self._merge_moments(len(values), mean, m2)
+        if self.hist_edges is None:
+            # No shared range: exact only while the column arrives in a single chunk
+            counts, edges = np.histogram(values, bins=self.bins)
+        else:
+            edges = self.hist_edges
+            if values.min() < edges[0] or values.max() > edges[-1]:
+                raise ValueError(f"{self.name!r} has values outside its histogram range; "
+                                 "profile chunks with the column ranges of the whole dataset")
+            counts, _ = np.histogram(values, bins=edges)
+        self._merge_histogram(counts, edges)
+
+    def _merge_moments(self, count, mean, m2):
+        # Chan et al. parallel variance update
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def _merge_histogram(self, counts, edges):
+        if counts is None:
+            return
+        if self.hist_counts is None:
+            self.hist_counts, self.hist_edges = counts.astype(np.int64), edges
+            return
+        # Counts can't be moved between different bins without smearing them, so only
+        # histograms over the same edges are merged
+        if not np.array_equal(self.hist_edges, edges):
+            raise ValueError(f"Histograms of {self.name!r} have different edges; build both profiles "
+                             "with the same ranges to merge them")
+        self.hist_counts = self.hist_counts + counts
+
+
+class DatasetProfile:
+    def __init__(self, skip_top=(), ranges=None):
+        self.rows = 0
+        self.columns = {}
+        self.skip_top = set(skip_top)
+        self.ranges = ranges or {}
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col, chunk[col].dtype, track_top=col not in self.skip_top,
+                                                  hist_range=self.ranges.get(col))
+            self.columns[col].update(chunk[col])
+
+    def merge(self, other: "DatasetProfile"):
+        self.rows += other.rows
+        for col, column in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(column)
+            else:
+                self.columns[col] = column
+
+    def summary_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Column": list(self.columns),
+            "Type": [str(c.dtype) for c in self.columns.values()],
+            "Missing (%)": [c.missing_pct for c in self.columns.values()],
+            "Distinct (est.)": [c.distinct for c in self.columns.values()],
+            "Min": ["" if c.minimum is None else str(c.minimum) for c in self.columns.values()],
+            "Max": ["" if c.maximum is None else str(c.maximum) for c in self.columns.values()],
+            "Mean": [round(c.mean, 4) if c.count else None for c in self.columns.values()],
+            "Std": [round(c.variance ** 0.5, 4) if c.count else None for c in self.columns.values()],
+        })
+
+
+@instrument()
+def profile_dataframe(df: pd.DataFrame, chunk_rows: int = PROFILE_CHUNK_ROWS, skip_top=()) -> DatasetProfile:
+    # Bin edges are fixed from the whole column first, so chunk histograms add up exactly
+    profile = DatasetProfile(skip_top, ranges=numeric_ranges(df))
+    for start in range(0, max(len(df), 1), chunk_rows):
+        profile.update(df.iloc[start:start + chunk_rows])
+    return profile
+
@@ -0,0 +1,84 @@
+import pandas as pd
+import streamlit as st
+
+from utils.compute import PandasBackend
+from utils.downsampling import Reduction, reduce_lines
+from utils.instrumentation import instrument
+
+GRANULARITIES = {"D": "day", "W": "week", "M": "month", "Q": "quarter"}
+GRANULARITY_OPTIONS = ("auto",) + tuple(GRANULARITIES)
+CHART_WIDTH_PX = 1200   # a full-width chart in the wide layout
+PIXELS_PER_POINT = 4    # markers closer than this overlap
+
+# Coarser levels are rolled up from the daily sums; weeks start on Monday, as in the backends
+_ROLLUP_RULES = {
+    "W": dict(rule="W-MON", closed="left", label="left"),
+    "M": dict(rule="MS"),
+    "Q": dict(rule="QS"),
+}
+
+
+def granularity_label(option: str) -> str:
+    return "Auto" if option == "auto" else GRANULARITIES[option].title()
+
+
+class Rollups:
+    """Per-day, week, month and quarter sums of every numeric column, for one date column."""
+
+    def __init__(self, date_col, daily: pd.DataFrame, rows_in: int):
+        self.date_col = date_col
+        self.rows_in = rows_in
+        daily = daily.set_index(date_col).sort_index()
+        self.frames = {"D": daily}
+        for freq, rule in _ROLLUP_RULES.items():
+            params = dict(rule)
+            # min_count=1 keeps periods with no rows empty instead of inventing zero totals
+            self.frames[freq] = daily.resample(params.pop("rule"), **params).sum(min_count=1).dropna(how="all")
+        self.start = daily.index.min() if len(daily) else None
+        self.end = daily.index.max() if len(daily) else None
+
+    def periods(self, freq: str) -> int:
+        if self.start is None:
+            return 0
+        return len(pd.period_range(self.start, self.end, freq=freq))
+
+    def auto_granularity(self, width_px: int = CHART_WIDTH_PX) -> str:
+        # The finest level whose periods across the span still fit the chart width
+        max_points = width_px // PIXELS_PER_POINT
+        for freq in GRANULARITIES:
+            if self.periods(freq) <= max_points:
+                return freq
+        return "Q"
+
+    def frame(self, value_cols, freq: str = "auto", width_px: int = CHART_WIDTH_PX):
+        # Returns (frame, freq, reduction) with the date column first
+        value_cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        if freq == "auto":
+            freq = self.auto_granularity(width_px)
+        data = self.frames[freq][value_cols].dropna(how="all").reset_index()
+        reduction = Reduction(f"{GRANULARITIES[freq]} totals", self.rows_in, len(data))
+        # Daily totals over decades can still outnumber the pixels
+        data, lines = reduce_lines(data, self.date_col, value_cols)
+        if lines.reduced:
+            reduction = Reduction(f"{GRANULARITIES[freq]} totals (LTTB)", self.rows_in, len(data))
+        return data, freq, reduction
+
+
+@instrument()
+def build_rollups(backend, date_col, value_cols) -> Rollups:
+    # One grouped pass over the rows for all numeric columns; everything coarser comes from the daily sums
+    daily = backend.resample_sum(date_col, list(value_cols), "D")
+    return Rollups(date_col, daily, backend.rows)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _cached_rollups(dataset_key, date_col, value_cols, _backend) -> Rollups:
+    return build_rollups(_backend, date_col, value_cols)
+
+
+def get_rollups(date_col, value_cols, df=None, backend=None, dataset_key=None) -> Rollups:
+    backend = backend if backend is not None else PandasBackend(df)
+    value_cols = tuple(value_cols)
+    if dataset_key is None:
+        return build_rollups(backend, date_col, value_cols)
+    return _cached_rollups(dataset_key, date_col, value_cols, backend)
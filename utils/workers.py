@@ -0,0 +1,86 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+BUILD_ERRORS = (ValueError, TypeError, KeyError)
+
+
+def create_worker_pool(max_workers: int | None = None, name: str = "chart-worker") -> ThreadPoolExecutor:
+    # Threads, not processes: jobs read the shared cached frames without pickling them,
+    # and the heavy NumPy/pandas kernels release the GIL
+    max_workers = max_workers or min(8, (os.cpu_count() or 1) + 1)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+class JobBatch:
+    """Jobs submitted by one rerun of one session.
+
+    Starting the session's next batch cancels this one: queued jobs never start,
+    and jobs already running finish but nobody waits for their results.
+    """
+
+    def __init__(self, pool, generation: int):
+        self.pool = pool
+        self.generation = generation
+        self.cancelled = threading.Event()
+        self._futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        script_ctx = get_script_run_ctx()
+        # Carries the rerun's perf recorder (and any other context) into the worker
+        context = contextvars.copy_context()
+
+        def run():
+            if self.cancelled.is_set():
+                raise CancelledError()
+            if script_ctx is not None:
+                add_script_run_ctx(threading.current_thread(), script_ctx)
+            return context.run(fn, *args, **kwargs)
+
+        future = self.pool.submit(run)
+        self._futures.append(future)
+        return future
+
+    def cancel(self):
+        self.cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+
+def start_job_batch(pool, state) -> JobBatch:
+    previous = state.get("job_batch")
+    if previous is not None:
+        previous.cancel()
+    batch = JobBatch(pool, previous.generation + 1 if previous is not None else 1)
+    state["job_batch"] = batch
+    return batch
+
+
+def placeholder(message: str = "⏳ Preparing chart…"):
+    slot = st.empty()
+    slot.caption(message)
+    return slot
+
+
+def fill_as_completed(slots, render):
+    """Render each job's result into its placeholder as soon as it is ready.
+
+    ``slots`` is a list of ``(placeholder, future, item)``; ``render(item, result)``
+    runs inside the placeholder on the script thread.
+    """
+    by_future = {future: (slot, item) for slot, future, item in slots}
+    for future in as_completed(by_future):
+        slot, item = by_future[future]
+        try:
+            result = future.result()
+        except CancelledError:
+            continue
+        except BUILD_ERRORS as e:
+            slot.warning(f"Could not build this chart: {e}")
+            continue
+        with slot.container():
+            render(item, result)